@@ -1,8 +1,12 @@
 # coding: utf-8
 
 # PYTHON IMPORTS
+import copy
+import inspect
+import json
+import logging
+import threading
 import time
-import datetime
 from functools import update_wrapper, partial
 
 # DJANGO IMPORTS
@@ -17,30 +21,85 @@ from django import forms
 from django.forms.formsets import all_valid
 from django.utils.html import escape
 from django.utils import six
-from django.db.models.loading import get_model
 from django.utils.text import get_text_list
 from django.contrib.admin.util import flatten_fieldsets
 from django.core.urlresolvers import reverse
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect, HttpResponseBadRequest, HttpResponseNotAllowed
+from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_protect
 from django.utils.decorators import method_decorator
-from django.db import transaction
+from django.db import connection
 from django.db.models import Q
 from django.conf.urls import patterns, url
 
 # PROJECT IMPORTS
-from vola.models import Language, Category, Container, Group, Plugin, Permission
+from vola.models import Language, Category, Container, Group, Plugin, Permission, get_plugin_model, downcast_plugins, get_permissions_version
 from vola import signals
+from vola import settings as vola_settings
+from vola.utils import deferred_transaction, commit_on_success_deferred, import_from, invalidate_group_cache
 
 csrf_protect_m = method_decorator(csrf_protect)
 
+# languages loaded with the container changelist, reset after rendering
+# (see ContainerAdmin.changelist_view and get_languages)
+_changelist = threading.local()
 
-def import_from(method):
-    v = method.split(".")
-    name = v.pop()
-    module = ".".join(v)
-    module = __import__(module, fromlist=[name])
-    return getattr(module, name)
+
+logger = logging.getLogger("vola.validation")
+
+# imported validation methods (see get_validation_method)
+_validation_methods = {}
+
+# form classes are not cached if one of these is overridden (see PluginAdmin.get_form_cache_key)
+FORMFIELD_HOOKS = ("formfield_for_dbfield", "formfield_for_choice_field", "formfield_for_foreignkey", "formfield_for_manytomany")
+
+
+def get_validation_method(path):
+    """
+    Import a validation method once per dotted path.
+
+    Returns the method and whether it accepts a ``context`` argument
+    (see ValidationContext).
+    """
+    if path not in _validation_methods:
+        method = import_from(path)
+        try:
+            args, varargs, varkw, defaults = inspect.getargspec(method)
+            accepts_context = "context" in args or varkw is not None
+        except TypeError:
+            accepts_context = False
+        _validation_methods[path] = (method, accepts_context)
+    return _validation_methods[path]
+
+
+class ValidationContext(object):
+    """
+    Passed to validation methods accepting a ``context`` argument.
+
+    ``originals`` maps plugin ids to the (downcasted) plugins as they have
+    been loaded, before the instances of the plugin forms have been updated
+    with the posted data. ``timings`` lists (method, seconds) for each
+    validation method.
+    """
+    def __init__(self, request, group, containeradminform, pluginadminforms):
+        self.request = request
+        self.group = group
+        self.container = containeradminform.form.instance
+        self.containeradminform = containeradminform
+        self.pluginadminforms = pluginadminforms
+        self.originals = {}
+        for adminform in pluginadminforms:
+            if adminform.original is not None:
+                self.originals[adminform.original.pk] = getattr(adminform, "unchanged", adminform.original)
+        self.timings = []
+
+    def get_original(self, adminform):
+        """
+        The original plugin for a given plugin admin form (None with extra plugins)
+        """
+        if adminform.original is None:
+            return None
+        return self.originals.get(adminform.original.pk)
 
 
 class AdminErrorList(forms.util.ErrorList):
@@ -122,34 +181,110 @@ class PluginAdmin(admin.ModelAdmin):
     #         return list(self.manager_fieldsets) + list(fieldsets)
     #     return list(fieldsets)
 
+    def __init__(self, model, admin_site):
+        super(PluginAdmin, self).__init__(model, admin_site)
+        self._form_cache = {}
+
     def get_form(self, request, obj=None, **kwargs):
         """
         Workaround bug http://code.djangoproject.com/ticket/9360 (thanks to peritus)
+
+        Form classes are cached with the admin (see get_form_cache_key).
+        """
+        kwargs["fields"] = flatten_fieldsets(self.get_fieldsets(request, obj))
+        key = self.get_form_cache_key(request, obj, **kwargs)
+        if key is None:
+            return super(PluginAdmin, self).get_form(request, obj, **kwargs)
+        if key not in self._form_cache:
+            self._form_cache[key] = super(PluginAdmin, self).get_form(request, obj, **kwargs)
+        return self._form_cache[key]
+
+    def get_form_cache_key(self, request, obj=None, **kwargs):
         """
-        return super(PluginAdmin, self).get_form(request, obj, fields=flatten_fieldsets(self.get_fieldsets(request, obj)))
+        Key for caching form classes, based on fields, readonly fields and
+        the users permissions (formfields depend on the permissions with
+        related models). Returns None in order to disable caching, e.g. if
+        a subclass overrides the formfield_for_* hooks (which may depend on
+        the request).
+        """
+        if set(kwargs) - set(["fields", "form"]):
+            return None
+        if any(name in cls.__dict__ for cls in type(self).__mro__ if issubclass(cls, PluginAdmin) and cls is not PluginAdmin for name in FORMFIELD_HOOKS):
+            return None
+        if request.user.is_superuser:
+            permissions = None
+        else:
+            permissions = frozenset(request.user.get_all_permissions())
+        return (tuple(kwargs["fields"]), kwargs.get("form"), tuple(self.get_readonly_fields(request, obj)), permissions)
 
-    @csrf_protect_m
-    @transaction.commit_on_success
-    def add_view(self, request, form_url="", extra_context=None):
+    def get_urls(self):
+        urls = super(PluginAdmin, self).get_urls()
+        info = self.model._meta.app_label, self.model._meta.module_name
+        vola_urls = patterns('',
+            url(r"^(.+)/form/$", self.admin_site.admin_view(self.form_view), name="%s_%s_form" % info),
+        )
+        return vola_urls + urls
+
+    def form_view(self, request, object_id, extra_context=None):
         """
-        Custom add view without inlines/formsets
+        Form of an existing plugin, loaded with the group view (see
+        VOLA_LAZY_PLUGINS and ContainerAdmin.get_plugin_summary)
         """
         model = self.model
         opts = model._meta
 
-        # FIXME: return 404 if request is non-ajax
-
-        if not self.has_add_permission(request):
+        obj = get_object_or_404(model, pk=unquote(object_id))
+        container_admin = self.admin_site._registry[Container]
+        if not container_admin.has_plugins_permission(request, obj.container_id):
             raise PermissionDenied
 
         c = request.GET.get("c", 1)
-        s = request.GET.get("s")
-        group = Group.objects.get(pk=s)
         prefix = "plugin_%s" % c
 
-        ModelForm = self.get_form(request)
-        form = ModelForm(prefix=prefix)
+        ModelForm = self.get_form(request, obj)
+        form = ModelForm(prefix=prefix, instance=obj)
+        adminForm = container_admin.get_plugin_admin_form(request, prefix, model, self, form, group=obj.group, obj=obj)
+
+        context = {
+            "adminform": adminForm,
+            "pluginmedia": self.media,
+            "errors": AdminErrorList(form, []),
+            "app_label": opts.app_label,
+        }
+        context.update(extra_context or {})
+        return self.render_change_form(request, context, change=True, obj=obj)
+
+    def save_model(self, request, obj, form, change):
+        """
+        Send the edit signals with saving a plugin (e.g. with the change
+        view of the plugin), without a group if the group has been changed
+        """
+        group = None if "group" in form.changed_data else obj.group
+        plugins = Plugin.objects.filter(container=obj.container, group=group)
+        signals.vola_pre_edit_plugins.send(sender=request, container=obj.container, group=group, plugins=plugins)
+        super(PluginAdmin, self).save_model(request, obj, form, change)
+        changes = signals.ChangeSet(obj.container)
+        if change:
+            changes.change(obj, form.changed_data)
+        else:
+            changes.add(obj)
+        signals.vola_post_edit_plugins.send(sender=request, container=obj.container, group=group, plugins=plugins, changes=changes)
 
+    def delete_model(self, request, obj):
+        """
+        Send the edit signals with deleting a plugin
+        """
+        plugins = Plugin.objects.filter(container=obj.container, group=obj.group)
+        signals.vola_pre_edit_plugins.send(sender=request, container=obj.container, group=obj.group, plugins=plugins)
+        changes = signals.ChangeSet(obj.container)
+        changes.delete(obj)
+        super(PluginAdmin, self).delete_model(request, obj)
+        signals.vola_post_edit_plugins.send(sender=request, container=obj.container, group=obj.group, plugins=plugins, changes=changes)
+
+    def get_add_admin_form(self, request, prefix, form):
+        """
+        Admin form for a new (extra) plugin
+        """
         adminForm = AdminForm(form, list(self.get_fieldsets(request)),
             self.get_prepopulated_fields(request),
             self.get_readonly_fields(request),
@@ -163,6 +298,31 @@ class PluginAdmin(admin.ModelAdmin):
         adminForm.app_label = self.model._meta.app_label
         adminForm.model_name = self.model.__name__.lower() # FIXME: ModelBase ???
         adminForm.inline_classes = adminForm.model_admin.inline_classes_add
+        adminForm.adminmedia = self.media
+        return adminForm
+
+    @csrf_protect_m
+    @commit_on_success_deferred
+    def add_view(self, request, form_url="", extra_context=None):
+        """
+        Custom add view without inlines/formsets
+        """
+        model = self.model
+        opts = model._meta
+
+        # FIXME: return 404 if request is non-ajax
+
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        c = request.GET.get("c", 1)
+        s = request.GET.get("s")
+        group = Group.objects.get(pk=s)
+        prefix = "plugin_%s" % c
+
+        ModelForm = self.get_form(request)
+        form = ModelForm(prefix=prefix)
+        adminForm = self.get_add_admin_form(request, prefix, form)
 
         context = {
             "adminform": adminForm,
@@ -174,14 +334,67 @@ class PluginAdmin(admin.ModelAdmin):
         return self.render_change_form(request, context, form_url=form_url, add=True)
 
 
+class ContentPluginForm(forms.ModelForm):
+    """
+    Form for a ``ContentPlugin``
+
+    Form fields for each ``ContentField`` are added with ``ContentPluginAdmin``.
+    Initial values are taken from the instance and cleaned values are set
+    with the instance (before saving).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(ContentPluginForm, self).__init__(*args, **kwargs)
+        for field in self._meta.model._content_fields:
+            if field.name in self.fields and field.name not in self.initial:
+                self.initial[field.name] = getattr(self.instance, field.name)
+
+    def _post_clean(self):
+        super(ContentPluginForm, self)._post_clean()
+        for field in self._meta.model._content_fields:
+            if field.name in self.cleaned_data:
+                setattr(self.instance, field.name, self.cleaned_data[field.name])
+
+
+class ContentPluginAdmin(PluginAdmin):
+    """
+    Admin for plugins extending ``ContentPlugin``
+    """
+    form = ContentPluginForm
+
+    def __init__(self, model, admin_site):
+        super(ContentPluginAdmin, self).__init__(model, admin_site)
+        self._content_forms = {}
+
+    def get_fieldsets(self, request, obj=None):
+        """
+        All content fields (and position), if no fieldsets are defined
+        """
+        if self.fieldsets is PluginAdmin.fieldsets:
+            fields = [field.name for field in self.model._content_fields] + ["position"]
+            return [("", {"fields": fields})]
+        return super(ContentPluginAdmin, self).get_fieldsets(request, obj)
+
+    def get_form(self, request, obj=None, **kwargs):
+        """
+        Add form fields for the models content fields
+        """
+        form = kwargs.get("form", self.form)
+        if form not in self._content_forms:
+            attrs = dict((field.name, field.formfield()) for field in self.model._content_fields)
+            self._content_forms[form] = type(str("%sForm" % self.model.__name__), (form,), attrs)
+        kwargs["form"] = self._content_forms[form]
+        return super(ContentPluginAdmin, self).get_form(request, obj, **kwargs)
+
+
 class ContainerAdmin(admin.ModelAdmin):
     """
     Admin definition of Container
     """
-    actions = None
+    actions = ["create_previews", "transfer_previews"]
     list_display = ("category", "container_name", "container_languages", "preview", "transfer_container", "transfer_date", "container_settings",)
     list_display_links = ("container_settings",)
-    list_filter = ("create_date", "update_date", "category", "preview",)
+    list_filter = ("create_date", "update_date", "category", "preview", "revision",)
     search_fields = ("name",)
 
     fieldsets = (
@@ -221,16 +434,38 @@ class ContainerAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_languages(self):
+        """
+        Languages for the changelist columns, loaded once per changelist
+        """
+        languages = getattr(_changelist, "languages", None)
+        if languages is None:
+            languages = list(Language.objects.all())
+        return languages
+
+    def get_group_link(self, obj):
+        """
+        Link to the first group (see queryset for first_group_id/group_count)
+        """
+        if hasattr(obj, "group_count"):
+            first_group_id = obj.first_group_id if obj.group_count else None
+        else:
+            groups = list(obj.groups.all()[:1])
+            first_group_id = groups[0].id if groups else None
+        if first_group_id is None:
+            return None
+        return reverse("admin:%s_%s_group" % (self.opts.app_label, self.opts.module_name), args=(obj.id, first_group_id,), current_app=self.admin_site.name)
+
     def container_name(self, obj):
         """
         Always link to the first plugin section.
         No link if languages are defined (see container_languages instead)
         """
-        if Language.objects.all().count():
+        if self.get_languages():
             return "<span class='vola-container-name'><strong>%s</strong></a></span>" % (obj.name)
         else:
-            if obj.groups.all().count():
-                link = reverse("admin:%s_%s_group" % (self.opts.app_label, self.opts.module_name), args=(obj.id, obj.groups.all()[0].id,), current_app=self.admin_site.name)
+            link = self.get_group_link(obj)
+            if link:
                 return "<a href='%s' class='vola-container-name'><strong>%s</strong></a>" % (link, obj.name)
             else:
                 return "<span class='vola-container-name'><strong>%s</strong></a></span>" % (obj.name)
@@ -243,9 +478,9 @@ class ContainerAdmin(admin.ModelAdmin):
         Always link to languages
         """
         r = ''
-        for item in Language.objects.all():
-            if obj.groups.all().count():
-                link = reverse("admin:%s_%s_group" % (self.opts.app_label, self.opts.module_name), args=(obj.id, obj.groups.all()[0].id,), current_app=self.admin_site.name)
+        link = self.get_group_link(obj)
+        for item in self.get_languages():
+            if link:
                 r = r + "<a href='%s?lang=%s' class='vola-container-language'><strong>%s</strong></a>" % (link, item, item)
             else:
                 r = r + "<span class='vola-container-language'><strong>%s</strong></a></span> " % (item)
@@ -261,11 +496,40 @@ class ContainerAdmin(admin.ModelAdmin):
     container_settings.short_description = _("Settings")
     container_settings.allow_tags = True
 
+    def changelist_view(self, request, extra_context=None):
+        """
+        Languages are loaded once for the changelist columns (see get_languages)
+        and reset after the response has been rendered.
+        """
+        _changelist.languages = list(Language.objects.all())
+        def reset_languages(response=None):
+            _changelist.languages = None
+        try:
+            response = super(ContainerAdmin, self).changelist_view(request, extra_context=extra_context)
+        except:
+            reset_languages()
+            raise
+        if getattr(response, "is_rendered", True):
+            reset_languages()
+        else:
+            response.add_post_render_callback(reset_languages)
+        return response
+
     def queryset(self, request):
         """
         Show only Containers a user is assigned to with the changelist
+
+        Category, transfer container, the first group and the number of
+        groups are selected with the containers (see container_name and
+        container_languages).
         """
-        qs = super(ContainerAdmin, self).queryset(request)
+        qn = connection.ops.quote_name
+        group_table = qn(Group._meta.db_table)
+        where = "%s.%s = %s.%s" % (group_table, qn("container_id"), qn(Container._meta.db_table), qn("id"))
+        qs = super(ContainerAdmin, self).queryset(request).select_related("category", "transfer_container").extra(select={
+            "first_group_id": "SELECT %s FROM %s WHERE %s ORDER BY %s DESC, %s LIMIT 1" % (qn("id"), group_table, where, qn("menu"), qn("position")),
+            "group_count": "SELECT COUNT(*) FROM %s WHERE %s" % (group_table, where),
+        })
         if request.user.is_superuser:
             return qs
         return qs.filter(Q(permissions__user=request.user) | Q(permissions__group__user=request.user)).distinct()
@@ -300,48 +564,47 @@ class ContainerAdmin(admin.ModelAdmin):
         info = self.model._meta.app_label, self.model._meta.module_name
         vola_urls = patterns('',
             url(r"^(?P<object_id>\d+)/group/(?P<group_id>\d+)/$", self.admin_site.admin_view(self.group_view), name="%s_%s_group" % info),
+            url(r"^(?P<object_id>\d+)/group/(?P<group_id>\d+)/reorder/$", self.admin_site.admin_view(self.reorder_view), name="%s_%s_reorder" % info),
+            url(r"^(?P<object_id>\d+)/group/(?P<group_id>\d+)/plugin/(?P<plugin_id>\d+)/$", self.admin_site.admin_view(self.plugin_view), name="%s_%s_plugin" % info),
+            url(r"^(?P<object_id>\d+)/group/(?P<group_id>\d+)/add/$", self.admin_site.admin_view(self.add_plugins_view), name="%s_%s_add_plugins" % info),
             url(r"^(.+)/make-preview/$", self.admin_site.admin_view(self.create_preview), name="%s_%s_create_preview" % info),
             url(r"^(.+)/transfer-preview/$", self.admin_site.admin_view(self.transfer_preview), name="%s_%s_transfer_preview" % info),
         )
         return vola_urls + urls
 
+    def get_plugin_catalog(self):
+        """
+        Returns all registered plugins (models registered with a ``PluginAdmin``)
+
+        The catalog is built once and rebuilt if the number of
+        registered models changes.
+        """
+        registry = self.admin_site._registry
+        if getattr(self, "_plugin_catalog_size", None) != len(registry):
+            catalog = []
+            for model, model_admin in six.iteritems(registry):
+                if isinstance(model_admin, PluginAdmin):
+                    catalog.append({
+                        "name": model._meta.verbose_name,
+                        "app_label": model._meta.app_label,
+                        "model_name": model.__name__.lower()
+                    })
+            self._plugin_catalog, self._plugin_catalog_size = catalog, len(registry)
+        return self._plugin_catalog
+
     def get_available_plugins(self, group):
         """
-        If registered plugin extends ``PluginAdmin``, append to plugin-list
+        Plugins of the catalog allowed with the group (see plugins_include/plugins_exclude)
         """
-        plugins = []
-        for model, model_admin in six.iteritems(self.admin_site._registry):
-            if model_admin.__class__.__bases__[0].__name__ == "PluginAdmin":
-                name = model._meta.verbose_name
-                app_label = model._meta.app_label
-                model_name = model.__name__.lower()
-                plugin = "%s.%s" % (app_label, model_name)
-                plugin_wildcard = "%s.*" % (app_label)
-                # make sure we have the plugin if plugins_include and 
-                # plugins_exclude is empty
-                plugins.append({
-                    "name": name,
-                    "app_label": app_label,
-                    "model_name": model_name
-                })
-                # remove plugin if it is not included
-                if group.plugins_include != "" and \
-                    not plugin in group.plugins_include.splitlines() and \
-                    not plugin_wildcard in group.plugins_include.splitlines():
-                    plugins.pop()
-                # remove plugin if it is excluded
-                if group.plugins_exclude != "" and \
-                    plugin in group.plugins_exclude.splitlines() or \
-                    plugin_wildcard in group.plugins_exclude.splitlines():
-                    plugins.pop()
-        plugins = sorted(plugins, key=lambda k: k["name"]) 
+        plugins = [plugin for plugin in self.get_plugin_catalog() if group.allows_plugin(plugin["app_label"], plugin["model_name"])]
+        plugins = sorted(plugins, key=lambda k: k["name"])
         return plugins
 
     def get_plugin_objects(self, request, app_label, model_name):
         """
         Return model, modeladmin and form for a plugin
         """
-        model = get_model(app_label, model_name)
+        model = get_plugin_model(app_label, model_name)
         modeladmin = self.admin_site._registry[model]
         modelform = modeladmin.get_form(request)
         return model, modeladmin, modelform
@@ -359,6 +622,9 @@ class ContainerAdmin(admin.ModelAdmin):
             model_admin=modeladmin)
         af.prefix = prefix
         af.original = obj
+        if obj is not None and form.is_bound:
+            # the instance is updated when validating the form
+            af.unchanged = copy.copy(obj)
         af.group = group
         af.can_delete = True
         af.sortable_field_name = "position"
@@ -370,27 +636,113 @@ class ContainerAdmin(admin.ModelAdmin):
         af.adminmedia = modeladmin.media # important for ajax calls
         return af
 
-    def save_plugins(self, request, forms, language):
-        for form in forms:
-            delete = request.POST.get("%s-DELETE" % form.prefix, 0)
-            if delete == "1":
-                form.instance.delete()
-            else:
-                if language:
-                    f = form.save(commit=False)
-                    f.language = language
-                    f.save()
-                else:
-                    form.save()
+    def get_plugin_media(self, pluginadminforms, container=True):
+        """
+        Media of the container admin, merged with the media of all plugin
+        admins and forms (once for each plugin admin and form class)
+
+        With ``container=False``, only the media of the plugins is returned.
+        """
+        medias = [self.media] if container else []
+        seen = set()
+        for pluginAdminForm in pluginadminforms:
+            key = (pluginAdminForm.model_admin, pluginAdminForm.form.__class__)
+            if key not in seen:
+                seen.add(key)
+                medias.extend([pluginAdminForm.adminmedia, pluginAdminForm.media])
+        media = forms.Media()
+        for m in medias:
+            media.add_js(m._js)
+            media.add_css(m._css)
+        return media
+
+    def get_plugin_summary(self, request, prefix, plugin):
+        """
+        Returns a summary of a plugin (without the plugins form)
 
-    def save_extra_plugins(self, request, forms, obj, group, language):
+        With large groups (see VOLA_LAZY_PLUGINS), the group view lists
+        summaries and plugin forms are loaded on demand (see PluginAdmin.form_view).
+        """
+        model = get_plugin_model(plugin.app_label, plugin.model_name)
+        url = reverse("admin:%s_%s_form" % (model._meta.app_label, model._meta.module_name), args=(plugin.id,), current_app=self.admin_site.name)
+        return {
+            "prefix": prefix,
+            "original": plugin,
+            "verbose_name": model._meta.verbose_name,
+            "url": "%s?c=%s" % (url, prefix.split("_")[-1]),
+            "position": request.POST.get("%s-position" % prefix, plugin.position),
+            "delete": request.POST.get("%s-DELETE" % prefix, 0),
+        }
+
+    def save_plugin_summaries(self, request, summaries, obj, group, changes=None):
+        """
+        Delete or reorder plugins which have not been loaded with the group view
+        """
+        positions = {}
+        for summary in summaries:
+            plugin = summary["original"]
+            if summary["delete"] == "1":
+                if changes is not None:
+                    changes.delete(plugin)
+                plugin.delete()
+            elif six.text_type(summary["position"]).isdigit() and int(summary["position"]) != plugin.position:
+                positions[plugin.pk] = int(summary["position"])
+                if changes is not None:
+                    changes.change(plugin, ["position"])
+        Plugin.objects.set_positions(positions, container=obj, group=group)
+
+    def save_plugins(self, request, forms, language, changes=None):
+        """
+        Save (or delete) existing plugins
+
+        Unchanged plugins are not saved. If only the position of a plugin
+        has changed (e.g. by sorting plugins), the positions are updated
+        with a single query. Deleted and changed plugins are added
+        to ``changes`` (a ChangeSet, see signals).
+        """
+        plugins = []
+        positions = {}
+        changed = []
+        with deferred_transaction():
+            for form in forms:
+                delete = request.POST.get("%s-DELETE" % form.prefix, 0)
+                if delete == "1":
+                    if changes is not None:
+                        changes.delete(form.instance)
+                    form.instance.delete()
+                elif form.has_changed():
+                    plugin = form.save(commit=False)
+                    if language:
+                        plugin.language = language
+                    if form.changed_data == ["position"] and not plugin.lookup_fields_changed():
+                        positions[plugin.pk] = plugin.position
+                    else:
+                        plugins.append(plugin)
+                    changed.append((plugin, form.changed_data))
+            Plugin.objects.set_positions(positions)
+            Plugin.objects.bulk_save(plugins)
+            for form in forms:
+                if hasattr(form, "save_m2m"):
+                    form.save_m2m()
+        if changes is not None:
+            for plugin, fields in changed:
+                changes.change(plugin, fields)
+
+    def save_extra_plugins(self, request, forms, obj, group, language, changes=None):
+        plugins = []
         for form in forms:
             plugin = form.save(commit=False)
             plugin.container = obj
             plugin.group = group
             if language:
                 plugin.language = language
-            plugin.save()
+            plugins.append(plugin)
+        Plugin.objects.bulk_save(plugins)
+        for form in forms:
+            form.save_m2m()
+        if changes is not None:
+            for plugin in plugins:
+                changes.add(plugin)
 
     def get_validation(self, group):
         """
@@ -406,14 +758,25 @@ class ContainerAdmin(admin.ModelAdmin):
         """
         Validate group with arbitrary plugins according to the
         groups validation methods (assigned with the admin interface)
+
+        Validation methods are imported once per dotted path. Methods
+        accepting a ``context`` argument get a ValidationContext.
         """
         valid = True
         validation_method_list = self.get_validation(group)
         # validate with each method
         if validation_method_list:
+            context = ValidationContext(request, group, containeradminform, pluginadminforms)
             for validation_method in validation_method_list:
-                validation = import_from(validation_method)
-                validation(request, group, containeradminform, pluginadminforms)
+                validation, accepts_context = get_validation_method(validation_method)
+                start = time.time()
+                if accepts_context:
+                    validation(request, group, containeradminform, pluginadminforms, context=context)
+                else:
+                    validation(request, group, containeradminform, pluginadminforms)
+                duration = time.time() - start
+                context.timings.append((validation_method, duration))
+                logger.debug("%s: %.2f ms (group %s)", validation_method, duration * 1000, group.pk)
         # check pluginadminforms/plugin errors
         for adminform in pluginadminforms:
             if len(adminform.form.errors):
@@ -424,8 +787,34 @@ class ContainerAdmin(admin.ModelAdmin):
             valid = False
         return valid
 
+    def save_formset(self, request, form, formset, change):
+        """
+        Send the edit signals with renaming or deleting groups (without
+        a group, so all groups are published)
+        """
+        if formset.model is not Group or not change:
+            return super(ContainerAdmin, self).save_formset(request, form, formset, change)
+        container = form.instance
+        deleted = [f.instance.pk for f in formset.deleted_forms if f.instance.pk]
+        renamed = [f.instance.pk for f in formset.initial_forms if f not in formset.deleted_forms and "slug" in f.changed_data]
+        if not deleted and not renamed:
+            return super(ContainerAdmin, self).save_formset(request, form, formset, change)
+        plugins = Plugin.objects.filter(container=container)
+        signals.vola_pre_edit_plugins.send(sender=request, container=container, group=None, plugins=plugins)
+        changes = signals.ChangeSet(container)
+        for plugin in plugins.filter(group__in=deleted):
+            changes.delete(plugin)
+        slugs = set(Group.objects.filter(pk__in=deleted + renamed).values_list("slug", flat=True))
+        super(ContainerAdmin, self).save_formset(request, form, formset, change)
+        slugs.update(Group.objects.filter(pk__in=renamed).values_list("slug", flat=True))
+        for slug in slugs:
+            invalidate_group_cache(container.cache_key, slug)
+        for plugin in plugins.filter(group__in=renamed):
+            changes.change(plugin, ["group"])
+        signals.vola_post_edit_plugins.send(sender=request, container=container, group=None, plugins=plugins, changes=changes)
+
     @csrf_protect_m
-    @transaction.commit_on_success
+    @commit_on_success_deferred
     def change_view(self, request, object_id, form_url='', extra_context=None):
         """
         Additional permissions with the change view
@@ -450,7 +839,7 @@ class ContainerAdmin(admin.ModelAdmin):
         return super(ContainerAdmin, self).history_view(request, object_id, extra_context=extra_context)
 
     @csrf_protect_m
-    @transaction.commit_on_success
+    @commit_on_success_deferred
     def group_view(self, request, object_id, group_id, form_url="", extra_context=None):
         """
         The change form for a ``Group`` without inlines/formsets, extended with ``pluginforms``.
@@ -483,7 +872,6 @@ class ContainerAdmin(admin.ModelAdmin):
         
         model = self.model
         opts = model._meta
-        media = self.media
 
         obj = self.get_object(request, unquote(object_id))
         # check permissions
@@ -507,22 +895,28 @@ class ContainerAdmin(admin.ModelAdmin):
             model_admin=self)
 
         errors = False
+        pluginsummaries = []
         if request.method == "POST":
             # pre signal
             plugins = Plugin.objects.filter(group=group, container=obj, language=language)
             signals.vola_pre_edit_plugins.send(sender=request, container=obj, group=group, plugins=plugins)
-            # plugins
-            counter = 0
-            for i, item in enumerate(plugins, start=1):
+            # plugins (forms of summaries have not been loaded, see get_plugin_summary)
+            plugins = list(plugins)
+            loaded = [plugin for i, plugin in enumerate(plugins, start=1) if "plugin_%s-summary" % i not in request.POST]
+            downcast_plugins(loaded)
+            loaded = set(plugin.pk for plugin in loaded)
+            for i, plugin in enumerate(plugins, start=1):
                 prefix = "plugin_%s" % i
-                plugin = eval("item."+item.model_name)
-                pluginModel, pluginModelAdmin, pluginModelForm = self.get_plugin_objects(request, item.app_label, item.model_name)
+                if plugin.pk not in loaded:
+                    pluginsummaries.append(self.get_plugin_summary(request, prefix, plugin))
+                    continue
+                plugin = plugin.downcast()
+                pluginModel, pluginModelAdmin, pluginModelForm = self.get_plugin_objects(request, plugin.app_label, plugin.model_name)
                 pluginModelForm = pluginModelForm(request.POST, request.FILES, prefix=prefix, instance=plugin)
                 pluginAdminForm = self.get_plugin_admin_form(request, prefix, pluginModel, pluginModelAdmin, pluginModelForm, group=group, obj=plugin)
                 pluginadminforms.append(pluginAdminForm)
                 pluginforms.append(pluginModelForm)
-                media = media + pluginModelAdmin.media + pluginAdminForm.media
-                counter = i
+            counter = len(plugins)
             # extra plugins
             extraforms_counter = int(request.POST.get("extraforms_counter", 0))
             if extraforms_counter > 0:
@@ -536,31 +930,37 @@ class ContainerAdmin(admin.ModelAdmin):
                         pluginAdminForm = self.get_plugin_admin_form(request, prefix, pluginModel, pluginModelAdmin, pluginModelForm, group=group)
                         pluginadminforms.append(pluginAdminForm)
                         extrapluginforms.append(pluginModelForm)
-                        media = media + pluginModelAdmin.media + pluginAdminForm.media
-            # VALIDATION
+                    # VALIDATION
             # form.is_valid() does not save the new data in DB.
             # However, it updates the instance object with new attributes so that it can use them when you call form.save().
             # Therefore, with group_valid we already have the updated instance(s).
             if all_valid(pluginforms) and all_valid(extrapluginforms) and self.group_valid(request, group, adminForm, pluginadminforms):
-                self.save_plugins(request, pluginforms, language)
-                self.save_extra_plugins(request, extrapluginforms, obj, group, language)
+                changes = signals.ChangeSet(obj)
+                with deferred_transaction():
+                    self.save_plugins(request, pluginforms, language, changes)
+                    self.save_plugin_summaries(request, pluginsummaries, obj, group, changes)
+                    self.save_extra_plugins(request, extrapluginforms, obj, group, language, changes)
                 change_message = self.construct_plugin_message(request, pluginforms, extrapluginforms)
                 self.log_change(request, obj, change_message)
                 # post signal
                 plugins = Plugin.objects.filter(group=group, container=obj, language=language)
-                signals.vola_post_edit_plugins.send(sender=request, container=obj, group=group, plugins=plugins)
+                signals.vola_post_edit_plugins.send(sender=request, container=obj, group=group, plugins=plugins, changes=changes)
                 return self.response_change(request, obj)
             else:
                 errors = True
         else:
-            for i, item in enumerate(Plugin.objects.filter(group=group, container=obj, language=language), start=1):
+            plugins = Plugin.objects.filter(group=group, container=obj, language=language)
+            if vola_settings.LAZY_PLUGINS:
+                plugins = list(plugins)
+                if len(plugins) > vola_settings.LAZY_PLUGINS:
+                    pluginsummaries = [self.get_plugin_summary(request, "plugin_%s" % i, plugin) for i, plugin in enumerate(plugins, start=1)]
+                    plugins = []
+            for i, plugin in enumerate(downcast_plugins(plugins), start=1):
                 prefix = "plugin_%s" % i
-                plugin = eval("item."+item.model_name)
-                pluginModel, pluginModelAdmin, pluginModelForm = self.get_plugin_objects(request, item.app_label, item.model_name)
+                pluginModel, pluginModelAdmin, pluginModelForm = self.get_plugin_objects(request, plugin.app_label, plugin.model_name)
                 pluginModelForm = pluginModelForm(prefix=prefix, instance=plugin)
                 pluginAdminForm = self.get_plugin_admin_form(request, prefix, pluginModel, pluginModelAdmin, pluginModelForm, group=group, obj=plugin)
                 pluginadminforms.append(pluginAdminForm)
-                media = media + pluginModelAdmin.media + pluginAdminForm.media
 
         context = {
             "title": u"%s — %s" % (obj, group),
@@ -574,13 +974,154 @@ class ContainerAdmin(admin.ModelAdmin):
             "app_label": opts.app_label,
             "adminform": adminForm,
             "pluginadminforms": pluginadminforms,
+            "pluginsummaries": pluginsummaries,
             "plugins": self.get_available_plugins(group),
             "extraforms_counter": extraforms_counter,
-            "media": media,
+            "media": self.get_plugin_media(pluginadminforms),
             "errors": errors,
         }
         return self.render_group_form(request, context, change=True, obj=obj, form_url=form_url)
 
+    @csrf_protect_m
+    @commit_on_success_deferred
+    def plugin_view(self, request, object_id, group_id, plugin_id):
+        """
+        Validate and save a single plugin of a group, returns JSON.
+
+        Expects a POST with the plugins form data (and the forms ``prefix``).
+        The other plugins are only loaded (with unbound forms, ``readonly`` is
+        set with their admin forms) if the group has validation methods.
+        """
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None:
+            raise Http404
+        if not self.has_plugins_permission(request, obj):
+            raise PermissionDenied
+        group = get_object_or_404(Group, pk=group_id, container=obj)
+        plugin = get_object_or_404(Plugin, pk=plugin_id, container=obj, group=group)
+        language = plugin.language
+        prefix = request.POST.get("prefix", "plugin_1")
+
+        # container admin form
+        # only used for non-plugin-errors
+        ModelForm = self.get_form(request, obj)
+        adminForm = AdminForm(ModelForm(instance=obj), self.get_fieldsets(request, obj),
+            self.get_prepopulated_fields(request, obj),
+            self.get_readonly_fields(request, obj),
+            model_admin=self)
+
+        plugins = Plugin.objects.filter(group=group, container=obj, language=language)
+        signals.vola_pre_edit_plugins.send(sender=request, container=obj, group=group, plugins=plugins)
+        if not self.get_validation(group):
+            plugins = [plugin]
+        pluginform = None
+        pluginadminforms = []
+        for i, p in enumerate(downcast_plugins(plugins), start=1):
+            pluginModel, pluginModelAdmin, pluginModelForm = self.get_plugin_objects(request, p.app_label, p.model_name)
+            if p.pk == plugin.pk:
+                pluginform = pluginModelForm(request.POST, request.FILES, prefix=prefix, instance=p)
+                pluginAdminForm = self.get_plugin_admin_form(request, prefix, pluginModel, pluginModelAdmin, pluginform, group=group, obj=p)
+            else:
+                readonly_prefix = "readonly_%s" % i
+                pluginAdminForm = self.get_plugin_admin_form(request, readonly_prefix, pluginModel, pluginModelAdmin, pluginModelForm(prefix=readonly_prefix, instance=p), group=group, obj=p)
+                pluginAdminForm.readonly = True
+            pluginadminforms.append(pluginAdminForm)
+
+        if pluginform.is_valid() and self.group_valid(request, group, adminForm, pluginadminforms):
+            changes = signals.ChangeSet(obj)
+            with deferred_transaction():
+                self.save_plugins(request, [pluginform], language, changes)
+            self.log_change(request, obj, self.construct_plugin_message(request, [pluginform], []))
+            # post signal
+            plugins = Plugin.objects.filter(group=group, container=obj, language=language)
+            signals.vola_post_edit_plugins.send(sender=request, container=obj, group=group, plugins=plugins, changes=changes)
+            return HttpResponse(json.dumps({"status": "ok", "id": plugin.pk}), content_type="application/json")
+
+        errors = {}
+        for pluginAdminForm in [adminForm] + pluginadminforms:
+            for field, messages in pluginAdminForm.form.errors.items():
+                key = "%s-%s" % (pluginAdminForm.form.prefix, field) if pluginAdminForm.form.prefix else field
+                errors[key] = [force_text(message) for message in messages]
+        return HttpResponseBadRequest(json.dumps({"status": "error", "errors": errors}), content_type="application/json")
+
+    def add_plugins_view(self, request, object_id, group_id):
+        """
+        Forms for multiple new plugins with one request
+
+        Plugins are given with ``p`` (app_label.model_name, e.g.
+        ``?p=blog.pluginentry&p=blog.pluginentry&p=pages.pluginsnippet``),
+        prefixes start with ``c``. The media of the plugins are
+        rendered once (see get_plugin_media).
+        """
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None:
+            raise Http404
+        if not self.has_plugins_permission(request, obj):
+            raise PermissionDenied
+        group = get_object_or_404(Group, pk=group_id, container=obj)
+        try:
+            c = int(request.GET.get("c", 1))
+        except ValueError:
+            return HttpResponseBadRequest()
+
+        plugins = {}
+        pluginadminforms = []
+        for n, plugin in enumerate(request.GET.getlist("p")):
+            app_label, _sep, model_name = plugin.partition(".")
+            if (app_label, model_name) not in plugins:
+                if not group.allows_plugin(app_label, model_name):
+                    raise PermissionDenied
+                try:
+                    pluginModel, pluginModelAdmin, pluginModelForm = self.get_plugin_objects(request, app_label, model_name)
+                except KeyError:
+                    raise Http404
+                if not pluginModelAdmin.has_add_permission(request):
+                    raise PermissionDenied
+                plugins[(app_label, model_name)] = pluginModelAdmin, pluginModelForm
+            pluginModelAdmin, pluginModelForm = plugins[(app_label, model_name)]
+            prefix = "plugin_%s" % (c + n)
+            pluginadminforms.append(pluginModelAdmin.get_add_admin_form(request, prefix, pluginModelForm(prefix=prefix)))
+
+        context = {
+            "pluginadminforms": pluginadminforms,
+            "media": self.get_plugin_media(pluginadminforms, container=False),
+            "group": group,
+            "original": obj,
+        }
+        return TemplateResponse(request, "admin/vola/container/plugins.html", context, current_app=self.admin_site.name)
+
+    @csrf_protect_m
+    @commit_on_success_deferred
+    def reorder_view(self, request, object_id, group_id):
+        """
+        Reorder the plugins of a group with a single query.
+
+        Expects a POST with an ordered list of plugin ids (``plugin``).
+        """
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None:
+            raise Http404
+        if not self.has_plugins_permission(request, obj):
+            raise PermissionDenied
+        group = get_object_or_404(Group, pk=group_id, container=obj)
+        try:
+            ids = [int(pk) for pk in request.POST.getlist("plugin")]
+        except ValueError:
+            return HttpResponseBadRequest()
+        plugins = Plugin.objects.filter(container=obj, group=group)
+        signals.vola_pre_edit_plugins.send(sender=request, container=obj, group=group, plugins=plugins)
+        positions = dict(plugins.filter(pk__in=ids).values_list("id", "position"))
+        Plugin.objects.reorder(ids, container=obj, group=group)
+        changes = signals.ChangeSet(obj)
+        for plugin in plugins.filter(pk__in=[pk for i, pk in enumerate(ids) if pk in positions and positions[pk] != i]):
+            changes.change(plugin, ["position"])
+        signals.vola_post_edit_plugins.send(sender=request, container=obj, group=group, plugins=plugins, changes=changes)
+        return HttpResponse("OK")
+
     def render_group_form(self, request, context, add=False, change=False, form_url="", obj=None):
         """
         Render group form, removed some variables compared to render_change_form.
@@ -618,7 +1159,7 @@ class ContainerAdmin(admin.ModelAdmin):
         change_message = " ".join(change_message)
         return change_message or _("No fields changed.")
 
-    @transaction.commit_on_success
+    @commit_on_success_deferred
     def create_preview(self, request, object_id, form_url="", extra_context=None):
         """
         Create preview (including permissions and groups/plugins)
@@ -631,45 +1172,10 @@ class ContainerAdmin(admin.ModelAdmin):
             raise PermissionDenied
         # pre signal
         signals.vola_pre_create_preview.send(sender=request, container=container)
-        # temporarily save given values
-        name = container.name
-        slug = container.slug
-        cache_key = container.cache_key
-        transfer_container_id = container.id 
-        # new container
-        container.pk = None
-        now = datetime.datetime.now()
-        container.name = "%s (%s)" % (container.name, time.time())
-        container.slug = "%s_%s" % (container.slug, time.time())
-        container.cache_key = "%s_%s" % (container.cache_key, time.time())
-        container.preview = True
-        container.save()
-        # set new name/slug/cache_key
-        container.name = "%s (%s)" % (name, container.id)
-        container.slug = "%s_%s" % (slug, container.id)
-        container.cache_key = "%s_%s" % (cache_key, container.id)
-        container.transfer_container_id = transfer_container_id
-        container.save()
-        # new permissions
-        for permission in Permission.objects.filter(container__id=unquote(object_id)):
-            permission.pk = None
-            permission.container = container
-            permission.save()
-        # new groups and new plugins
-        for group in Group.objects.filter(container__id=unquote(object_id)):
-            group_id = group.id
-            group.pk = None
-            group.container = container
-            group.save()
-            for plugin in Plugin.objects.filter(container__id=unquote(object_id), group=group_id):
-                p = eval("plugin."+plugin.model_name)
-                p.pk = None
-                p.id = None
-                p.container = container
-                p.group = group
-                p.save()
+        changes = signals.ChangeSet()
+        container = container.create_preview(changes=changes)
         # post signal
-        signals.vola_post_create_preview.send(sender=request, container=container)
+        signals.vola_post_create_preview.send(sender=request, container=container, changes=changes)
         # message and redirect
         msg_dict = {"name": force_text(opts.verbose_name), "obj": force_text(container)}
         msg = _("The %(obj)s was added successfully. You may edit it again below.") % msg_dict
@@ -677,10 +1183,10 @@ class ContainerAdmin(admin.ModelAdmin):
         post_url_continue = reverse("admin:%s_%s_change" % (opts.app_label, opts.module_name), args=(container.id,), current_app=self.admin_site.name)
         return HttpResponseRedirect(post_url_continue)
 
-    @transaction.commit_on_success
+    @commit_on_success_deferred
     def transfer_preview(self, request, object_id, form_url="", extra_context=None):
         """
-        Transfer preview (including permissions and groups/plugins)
+        Transfer preview (the former content is kept as a revision)
         """
         model = self.model
         opts = model._meta
@@ -691,34 +1197,10 @@ class ContainerAdmin(admin.ModelAdmin):
             raise PermissionDenied
         # pre signal
         signals.vola_pre_transfer_preview.send(sender=request, container=preview)
-        # delete permissions and groups/plugins
-        Permission.objects.filter(container=container).delete()
-        Plugin.objects.filter(container=container).delete()
-        Group.objects.filter(container=container).delete()
-        # transfer permissions
-        for permission in Permission.objects.filter(container=preview):
-            permission.pk = None
-            permission.container = container
-            permission.save()
-        # transfer groups and plugins
-        for group in Group.objects.filter(container=preview):
-            group_id = group.id
-            group.pk = None
-            group.container = container
-            group.save()
-            for plugin in Plugin.objects.filter(container=preview, group=group_id):
-                p = eval("plugin."+plugin.model_name)
-                p.pk = None
-                p.id = None
-                p.container = container
-                p.group = group
-                p.save()
-        # FIXME: reset preview attributes
-        # FIXME: transfer_date???
-        # delete preview
-        preview.delete()
+        changes = signals.ChangeSet()
+        container = preview.transfer(changes=changes)
         # post signal
-        signals.vola_post_transfer_preview.send(sender=request, container=container)
+        signals.vola_post_transfer_preview.send(sender=request, container=container, changes=changes)
         # message and redirect
         msg_dict = {"name": force_text(opts.verbose_name), "obj": force_text(container)}
         msg = _("The %(obj)s was changed successfully. You may edit it again below.") % msg_dict
@@ -726,34 +1208,69 @@ class ContainerAdmin(admin.ModelAdmin):
         post_url_continue = reverse("admin:%s_%s_change" % (opts.app_label, opts.module_name), args=(container.id,), current_app=self.admin_site.name)
         return HttpResponseRedirect(post_url_continue)
 
+    def get_actions(self, request):
+        """
+        Deleting containers with the changelist is not supported
+        """
+        actions = super(ContainerAdmin, self).get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    def create_previews(self, request, queryset):
+        """
+        Create previews for the selected containers (see ContainerManager.create_previews)
+        """
+        containers = [obj for obj in queryset.filter(preview=False) if self.has_preview_permission(request, obj)]
+        previews = Container.objects.create_previews(containers, sender=request)
+        self.message_user(request, _("%(count)s previews have been created.") % {"count": len(previews)})
+    create_previews.short_description = _("Create previews")
+
+    def transfer_previews(self, request, queryset):
+        """
+        Transfer the selected previews (see ContainerManager.transfer_previews),
+        with multiple previews of a container the newest preview is transferred
+        """
+        previews = [obj for obj in queryset.filter(preview=True, revision=False).order_by("-id") if self.has_preview_permission(request, obj.transfer_container_id)]
+        containers = Container.objects.transfer_previews(previews, sender=request)
+        self.message_user(request, _("%(count)s previews have been transferred.") % {"count": len(containers)})
+    transfer_previews.short_description = _("Transfer previews")
+
     # FIXME:
     # add delete preview (no delete container permissions needed)
 
+    def get_permissions(self, request, obj=None):
+        """
+        Returns (manage_container, manage_preview, manage_plugins) for the
+        user and a container (or container id), memoized with the request.
+        """
+        version, permissions = getattr(request, "_vola_permissions", (None, None))
+        if version != get_permissions_version():
+            version, permissions = request._vola_permissions = (get_permissions_version(), {})
+        container_id = getattr(obj, "pk", obj)
+        key = force_text(container_id) if container_id is not None else None
+        if key not in permissions:
+            permissions[key] = Permission.objects.get_flags(request.user, container_id)
+        return permissions[key]
+
     def has_container_permission(self, request, obj=None):
         if request.user.is_superuser:
             return True
         if request.user.has_perm("vola.change_container"):
-            if Permission.objects.filter(container=obj, user=request.user, manage_container=True).exists() or \
-                Permission.objects.filter(container=obj, group__in=request.user.groups.all().values_list("id"), manage_container=True).exists():
-                return True
+            return self.get_permissions(request, obj)[0]
         return False
 
     def has_preview_permission(self, request, obj=None):
         if request.user.is_superuser:
             return True
         if request.user.has_perm("vola.change_container"):
-            if Permission.objects.filter(container=obj, user=request.user, manage_preview=True).exists() or \
-                Permission.objects.filter(container=obj, group__in=request.user.groups.all().values_list("id"), manage_preview=True).exists():
-                return True
+            return self.get_permissions(request, obj)[1]
         return False
 
     def has_plugins_permission(self, request, obj=None):
         if request.user.is_superuser:
             return True
         if request.user.has_perm("vola.change_container"):
-            if Permission.objects.filter(container=obj, user=request.user, manage_plugins=True).exists() or \
-                Permission.objects.filter(container=obj, group__in=request.user.groups.all().values_list("id"), manage_plugins=True).exists():
-                return True
+            return self.get_permissions(request, obj)[2]
         return False
 
 # Registering the container model with the main admin site
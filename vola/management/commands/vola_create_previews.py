@@ -0,0 +1,53 @@
+# coding: utf-8
+
+# PYTHON IMPORTS
+from optparse import make_option
+
+# DJANGO IMPORTS
+from django.core.management.base import BaseCommand, CommandError
+
+# PROJECT IMPORTS
+from vola.models import Container
+
+
+class Command(BaseCommand):
+    """
+    Create previews for containers of a category (or with the given slugs)
+
+    Usage:
+    python manage.py vola_create_previews --category=Pages
+    python manage.py vola_create_previews home blog
+    """
+    args = "<container_slug container_slug ...>"
+    help = "Create previews for multiple containers."
+    option_list = BaseCommand.option_list + (
+        make_option("--category", action="store", dest="category", default=None,
+            help="Name (or id) of the category."),
+        make_option("--chunk-size", action="store", dest="chunk_size", type="int", default=10,
+            help="Number of containers with each transaction."),
+    )
+
+    def handle(self, *args, **options):
+        if not args and not options["category"]:
+            raise CommandError("Please give a category or container slugs.")
+        containers = get_containers(args, options["category"]).filter(preview=False)
+        previews = Container.objects.create_previews(containers, chunk_size=options["chunk_size"], sender=self, progress=self.progress)
+        self.stdout.write("%s previews created" % len(previews))
+
+    def progress(self, done, total):
+        self.stdout.write("%s/%s containers" % (done, total))
+
+
+def get_containers(slugs, category=None):
+    """
+    Containers with the given slugs and/or category (name or id)
+    """
+    containers = Container.objects.order_by("id")
+    if slugs:
+        containers = containers.filter(slug__in=slugs)
+    if category:
+        if category.isdigit():
+            containers = containers.filter(category_id=category)
+        else:
+            containers = containers.filter(category__name=category)
+    return containers
@@ -0,0 +1,41 @@
+# coding: utf-8
+
+# PYTHON IMPORTS
+from optparse import make_option
+
+# DJANGO IMPORTS
+from django.core.management.base import BaseCommand
+
+# PROJECT IMPORTS
+from vola.models import Container
+from vola.utils import deferred_transaction
+
+
+class Command(BaseCommand):
+    """
+    Delete revisions of containers (all containers if no slug is given)
+
+    With transferring a preview, the former content is kept as a
+    revision (unless VOLA_REVISIONS is set). Schedule the command when
+    VOLA_TRANSFER_REVISIONS is None. By default, the latest revision of
+    each container is kept.
+
+    Usage:
+    python manage.py vola_delete_revisions
+    python manage.py vola_delete_revisions --keep=0 home blog
+    """
+    args = "<container_slug container_slug ...>"
+    help = "Delete revisions of containers."
+    option_list = BaseCommand.option_list + (
+        make_option("--keep", action="store", dest="keep", type="int", default=1,
+            help="Number of revisions to keep with each container."),
+    )
+
+    def handle(self, *args, **options):
+        containers = Container.objects.filter(preview=False)
+        if args:
+            containers = containers.filter(slug__in=args)
+        for container in containers:
+            with deferred_transaction():
+                revisions = container.delete_revisions(options["keep"])
+            self.stdout.write("%s: %s revisions deleted" % (container.slug, len(revisions)))
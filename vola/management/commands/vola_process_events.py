@@ -0,0 +1,68 @@
+# coding: utf-8
+
+# PYTHON IMPORTS
+import time
+from optparse import make_option
+
+# DJANGO IMPORTS
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# PROJECT IMPORTS
+from vola.models import Event, expire_view_cache_events
+from vola.utils import import_from, defer_cache_invalidation
+from vola import settings as vola_settings
+
+
+class Command(BaseCommand):
+    """
+    Process recorded events (see VOLA_EVENTS) with VOLA_EVENT_HANDLERS
+
+    With VOLA_EXPIRE_VIEW_CACHE, cached pages of the containers are
+    expired first (see expire_view_cache_events).
+
+    Events are fetched in batches and locked (select_for_update) while
+    being processed, events of the same container and group are handled
+    together. Failed events are retried with the next run.
+
+    Usage (e.g. with a cronjob):
+    python manage.py vola_process_events
+    python manage.py vola_process_events --loop --interval=5
+    """
+    help = "Process recorded events with the configured event handlers."
+    option_list = BaseCommand.option_list + (
+        make_option("--batch-size", action="store", dest="batch_size", type="int", default=100,
+            help="Number of events processed at once."),
+        make_option("--loop", action="store_true", dest="loop", default=False,
+            help="Keep running and check for events every interval."),
+        make_option("--interval", action="store", dest="interval", type="int", default=10,
+            help="Seconds between checks with --loop."),
+    )
+
+    def handle(self, *args, **options):
+        handlers = [import_from(path) for path in vola_settings.EVENT_HANDLERS]
+        if vola_settings.EXPIRE_VIEW_CACHE:
+            handlers.insert(0, expire_view_cache_events)
+        while True:
+            processed = self.process_events(handlers, options["batch_size"])
+            if processed:
+                self.stdout.write("%s events processed" % processed)
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def process_events(self, handlers, batch_size):
+        """
+        Process all pending events (in batches), returns the number of processed events
+        """
+        processed = 0
+        seen = set()
+        while True:
+            # cache keys (and cached pages) are deleted after the commit
+            with defer_cache_invalidation(), transaction.commit_on_success():
+                events = list(Event.objects.get_pending().exclude(pk__in=seen).select_for_update()[:batch_size])
+                if not events:
+                    break
+                seen.update(event.pk for event in events)
+                processed += Event.objects.process(events, handlers)
+        return processed
@@ -0,0 +1,32 @@
+# coding: utf-8
+
+# PYTHON IMPORTS
+from optparse import make_option
+
+# DJANGO IMPORTS
+from django.core.management.base import BaseCommand
+
+# PROJECT IMPORTS
+from vola.models import Container, Snapshot
+from vola.utils import deferred_transaction
+
+
+class Command(BaseCommand):
+    """
+    Publish snapshots for containers (all containers if no slug is given)
+
+    Usage:
+    python manage.py vola_publish
+    python manage.py vola_publish home blog
+    """
+    args = "<container_slug container_slug ...>"
+    help = "Publish snapshots of containers (see VOLA_SNAPSHOTS)."
+
+    def handle(self, *args, **options):
+        containers = Container.objects.filter(preview=False)
+        if args:
+            containers = containers.filter(slug__in=args)
+        for container in containers:
+            with deferred_transaction():
+                snapshots = Snapshot.objects.publish_container(container)
+            self.stdout.write("%s: %s snapshots published" % (container.slug, len(snapshots)))
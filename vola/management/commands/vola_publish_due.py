@@ -0,0 +1,93 @@
+# coding: utf-8
+
+# PYTHON IMPORTS
+import datetime
+import time
+from optparse import make_option
+
+# DJANGO IMPORTS
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+# PROJECT IMPORTS
+from vola.models import Container
+from vola.utils import deferred_transaction
+from vola import signals
+
+
+class Command(BaseCommand):
+    """
+    Transfer previews with a transfer_date which has passed
+
+    Each preview is transferred with its own transaction. The container
+    and its previews are locked (select_for_update), so several instances
+    of the command are able to run at the same time. The cache of the
+    new content is filled before switching (see Container.transfer).
+
+    Usage (e.g. with a cronjob):
+    python manage.py vola_publish_due
+    python manage.py vola_publish_due --loop --interval=30
+    """
+    help = "Transfer previews with a transfer date which has passed."
+    option_list = BaseCommand.option_list + (
+        make_option("--batch-size", action="store", dest="batch_size", type="int", default=10,
+            help="Number of previews fetched at once."),
+        make_option("--loop", action="store_true", dest="loop", default=False,
+            help="Keep running and check for due previews every interval."),
+        make_option("--interval", action="store", dest="interval", type="int", default=60,
+            help="Seconds between checks with --loop."),
+    )
+
+    def handle(self, *args, **options):
+        while True:
+            transferred = self.publish_due(options["batch_size"])
+            if transferred:
+                self.stdout.write("%s previews transferred" % transferred)
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def publish_due(self, batch_size):
+        """
+        Transfer all due previews (in batches), returns the number of transferred previews
+        """
+        now = datetime.datetime.now()
+        transferred = 0
+        skipped = set()
+        while True:
+            ids = list(Container.objects.get_due_previews(now).exclude(pk__in=skipped).values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            for pk in ids:
+                container = self.transfer(pk, now)
+                if container is None:
+                    skipped.add(pk)
+                    continue
+                self.stdout.write("%s: transferred preview %s" % (container.slug, pk))
+                transferred += 1
+        return transferred
+
+    def transfer(self, pk, now):
+        """
+        Transfer a preview, returns the new container or None if the
+        preview is not due anymore (e.g. if it has been transferred
+        with another process)
+
+        The container and all of its previews are locked (ordered by id),
+        because transferring updates the previews of the container.
+        The post signal is sent within the transaction (see VOLA_EVENTS).
+        """
+        container_ids = list(Container.objects.filter(pk=pk).values_list("transfer_container", flat=True))
+        if not container_ids:
+            return None
+        with deferred_transaction():
+            list(Container.objects.select_for_update().filter(Q(pk=container_ids[0]) | Q(transfer_container=container_ids[0])).order_by("id"))
+            previews = list(Container.objects.get_due_previews(now).filter(pk=pk, transfer_container=container_ids[0]))
+            if not previews:
+                return None
+            preview = previews[0]
+            signals.vola_pre_transfer_preview.send(sender=self, container=preview)
+            changes = signals.ChangeSet()
+            container = preview.transfer(changes=changes)
+            signals.vola_post_transfer_preview.send(sender=self, container=container, changes=changes)
+        return container
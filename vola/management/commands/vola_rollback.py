@@ -0,0 +1,43 @@
+# coding: utf-8
+
+# DJANGO IMPORTS
+from django.core.management.base import BaseCommand, CommandError
+
+# PROJECT IMPORTS
+from vola.models import Container, Snapshot, Revision
+from vola.utils import deferred_transaction
+from vola import settings as vola_settings
+
+
+class Command(BaseCommand):
+    """
+    Restore the content of a container with a revision (see VOLA_REVISIONS)
+
+    Lists the revisions of a container if no version is given.
+
+    Usage:
+    python manage.py vola_rollback home
+    python manage.py vola_rollback home 12
+    """
+    args = "<container_slug> [version]"
+    help = "Restore the content of a container with a revision."
+
+    def handle(self, *args, **options):
+        if len(args) not in (1, 2):
+            raise CommandError("Usage: vola_rollback <container_slug> [version]")
+        try:
+            container = Container.objects.get(slug=args[0])
+        except Container.DoesNotExist:
+            raise CommandError("Container %s does not exist." % args[0])
+        if len(args) == 1:
+            for revision in Revision.objects.filter(container=container):
+                self.stdout.write("%s: %s%s" % (revision.version, revision.create_date, " (checkpoint)" if revision.checkpoint else ""))
+            return
+        try:
+            with deferred_transaction():
+                groups = Revision.objects.rollback(container, int(args[1]))
+                if vola_settings.SNAPSHOTS and not container.preview:
+                    Snapshot.objects.publish_container(container, groups)
+        except (ValueError, Revision.DoesNotExist):
+            raise CommandError("Revision %s does not exist." % args[1])
+        self.stdout.write("%s: %s groups restored" % (container.slug, len(groups)))
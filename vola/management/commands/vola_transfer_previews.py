@@ -0,0 +1,42 @@
+# coding: utf-8
+
+# PYTHON IMPORTS
+from optparse import make_option
+
+# DJANGO IMPORTS
+from django.core.management.base import BaseCommand, CommandError
+
+# PROJECT IMPORTS
+from vola.models import Container
+from vola.management.commands.vola_create_previews import get_containers
+
+
+class Command(BaseCommand):
+    """
+    Transfer previews of a category (or of containers with the given slugs)
+
+    Only the latest preview of each container is transferred.
+
+    Usage:
+    python manage.py vola_transfer_previews --category=Pages
+    python manage.py vola_transfer_previews home blog
+    """
+    args = "<container_slug container_slug ...>"
+    help = "Transfer previews of multiple containers."
+    option_list = BaseCommand.option_list + (
+        make_option("--category", action="store", dest="category", default=None,
+            help="Name (or id) of the category."),
+        make_option("--chunk-size", action="store", dest="chunk_size", type="int", default=10,
+            help="Number of previews with each transaction."),
+    )
+
+    def handle(self, *args, **options):
+        if not args and not options["category"]:
+            raise CommandError("Please give a category or container slugs.")
+        containers = get_containers(args, options["category"]).filter(preview=False)
+        previews = Container.objects.filter(transfer_container__in=containers, preview=True, revision=False).order_by("-id")
+        containers = Container.objects.transfer_previews(previews, chunk_size=options["chunk_size"], sender=self, progress=self.progress)
+        self.stdout.write("%s previews transferred" % len(containers))
+
+    def progress(self, done, total):
+        self.stdout.write("%s/%s previews" % (done, total))
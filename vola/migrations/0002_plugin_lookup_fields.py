@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding field 'Plugin.container_slug'
+        db.add_column(u'vola_plugin', 'container_slug',
+                      self.gf('django.db.models.fields.SlugField')(db_index=False, default='', max_length=200, blank=True),
+                      keep_default=False)
+
+        # Adding field 'Plugin.group_slug'
+        db.add_column(u'vola_plugin', 'group_slug',
+                      self.gf('django.db.models.fields.SlugField')(db_index=False, default='', max_length=200, blank=True),
+                      keep_default=False)
+
+        # Adding field 'Plugin.language_code'
+        db.add_column(u'vola_plugin', 'language_code',
+                      self.gf('django.db.models.fields.CharField')(default='', max_length=7, blank=True),
+                      keep_default=False)
+
+        # Adding index on 'Plugin', fields ['container_slug', 'group_slug', 'language_code']
+        # (created explicitly, since Meta.index_together requires Django 1.5)
+        db.create_index(u'vola_plugin', ['container_slug', 'group_slug', 'language_code'])
+
+
+    def backwards(self, orm):
+        # Removing index on 'Plugin', fields ['container_slug', 'group_slug', 'language_code']
+        db.delete_index(u'vola_plugin', ['container_slug', 'group_slug', 'language_code'])
+
+        # Deleting field 'Plugin.container_slug'
+        db.delete_column(u'vola_plugin', 'container_slug')
+
+        # Deleting field 'Plugin.group_slug'
+        db.delete_column(u'vola_plugin', 'group_slug')
+
+        # Deleting field 'Plugin.language_code'
+        db.delete_column(u'vola_plugin', 'language_code')
+
+
+    models = {
+        u'auth.group': {
+            'Meta': {'object_name': 'Group'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '80'}),
+            'permissions': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['auth.Permission']", 'symmetrical': 'False', 'blank': 'True'})
+        },
+        u'auth.permission': {
+            'Meta': {'ordering': "(u'content_type__app_label', u'content_type__model', u'codename')", 'unique_together': "((u'content_type', u'codename'),)", 'object_name': 'Permission'},
+            'codename': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        },
+        u'auth.user': {
+            'Meta': {'object_name': 'User'},
+            'date_joined': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75', 'blank': 'True'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'groups': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['auth.Group']", 'symmetrical': 'False', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'is_active': ('django.db.models.fields.BooleanField', [], {'default': 'True'}),
+            'is_staff': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'is_superuser': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'last_login': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'password': ('django.db.models.fields.CharField', [], {'max_length': '128'}),
+            'user_permissions': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['auth.Permission']", 'symmetrical': 'False', 'blank': 'True'}),
+            'username': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '30'})
+        },
+        u'contenttypes.contenttype': {
+            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        u'sites.site': {
+            'Meta': {'ordering': "('domain',)", 'object_name': 'Site', 'db_table': "'django_site'"},
+            'domain': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        },
+        u'vola.category': {
+            'Meta': {'ordering': "['position']", 'object_name': 'Category'},
+            'create_date': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '200'}),
+            'position': ('django.db.models.fields.IntegerField', [], {'default': '-1'}),
+            'update_date': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'vola.container': {
+            'Meta': {'ordering': "['category', 'name', '-preview']", 'object_name': 'Container'},
+            'cache_key': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '200'}),
+            'category': ('django.db.models.fields.related.ForeignKey', [], {'blank': 'True', 'related_name': "'containers'", 'null': 'True', 'to': u"orm['vola.Category']"}),
+            'create_date': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'description': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '200'}),
+            'page_url': ('django.db.models.fields.CharField', [], {'max_length': '200', 'blank': 'True'}),
+            'position': ('django.db.models.fields.PositiveIntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'preview': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'preview_url': ('django.db.models.fields.CharField', [], {'max_length': '200', 'blank': 'True'}),
+            'site': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['sites.Site']", 'null': 'True', 'blank': 'True'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '200'}),
+            'transfer_container': ('django.db.models.fields.related.ForeignKey', [], {'blank': 'True', 'related_name': "'previews'", 'null': 'True', 'to': u"orm['vola.Container']"}),
+            'transfer_date': ('django.db.models.fields.DateTimeField', [], {'null': 'True', 'blank': 'True'}),
+            'update_date': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'vola.group': {
+            'Meta': {'ordering': "['-menu', 'position']", 'unique_together': "(('container', 'slug'), ('container', 'cache_key'))", 'object_name': 'Group'},
+            'cache_key': ('django.db.models.fields.SlugField', [], {'max_length': '200'}),
+            'container': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'groups'", 'to': u"orm['vola.Container']"}),
+            'create_date': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'description': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'menu': ('django.db.models.fields.BooleanField', [], {'default': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'plugins_exclude': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'plugins_include': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'position': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '200'}),
+            'update_date': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'validation': ('django.db.models.fields.TextField', [], {'blank': 'True'})
+        },
+        u'vola.language': {
+            'Meta': {'ordering': "['position']", 'object_name': 'Language'},
+            'create_date': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '7'}),
+            'position': ('django.db.models.fields.IntegerField', [], {'default': '-1'}),
+            'update_date': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'vola.permission': {
+            'Meta': {'unique_together': "(('container', 'user', 'group'),)", 'object_name': 'Permission'},
+            'container': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'permissions'", 'to': u"orm['vola.Container']"}),
+            'create_date': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'group': ('django.db.models.fields.related.ForeignKey', [], {'blank': 'True', 'related_name': "'vola_permissions'", 'null': 'True', 'to': u"orm['auth.Group']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'manage_container': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'manage_plugins': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'manage_preview': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'update_date': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'blank': 'True', 'related_name': "'vola_permissions'", 'null': 'True', 'to': u"orm['auth.User']"})
+        },
+        u'vola.plugin': {
+            'Meta': {'ordering': "['position']", 'object_name': 'Plugin'},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'container': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'plugins'", 'to': u"orm['vola.Container']"}),
+            'container_slug': ('django.db.models.fields.SlugField', [], {'db_index': 'False', 'max_length': '200', 'blank': 'True'}),
+            'create_date': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'group': ('django.db.models.fields.related.ForeignKey', [], {'blank': 'True', 'related_name': "'plugins'", 'null': 'True', 'to': u"orm['vola.Group']"}),
+            'group_slug': ('django.db.models.fields.SlugField', [], {'db_index': 'False', 'max_length': '200', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'language': ('django.db.models.fields.related.ForeignKey', [], {'blank': 'True', 'related_name': "'plugins'", 'null': 'True', 'to': u"orm['vola.Language']"}),
+            'language_code': ('django.db.models.fields.CharField', [], {'max_length': '7', 'blank': 'True'}),
+            'lock_content': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'lock_position': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'model_name': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'position': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '200', 'blank': 'True'}),
+            'update_date': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['vola']
\ No newline at end of file
@@ -1,25 +1,63 @@
 # coding: utf-8
 
 # PYTHON IMPORTS
+import ast
 import datetime
-import re
+import random
+import json
+import uuid
+import time
+import copy
+import functools
+import logging
+import traceback
 
 # DJANGO IMPORTS
-from django.db import models
+from django.db import models, connections
 from django import template
-from django.db.models.signals import post_save
+from django import forms
+from django.db.models import Q, F
+from django.db.models.signals import post_save, post_delete, class_prepared
 from django.core.exceptions import ValidationError
 from django.utils.translation import ugettext as _
+from django.utils.text import capfirst
 from django.conf.global_settings import LANGUAGES
 from django.contrib.auth.models import User, Group as UserGroup
 from django.contrib.sites.models import Site
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes import generic
 from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.urlresolvers import reverse  # used with page_url (see get_container_url)
+from django.utils.encoding import is_protected_type
 
 # PROJECT IMPORTS
 from positions.fields import PositionField
 
+# VOLA IMPORTS
+from vola import settings as vola_settings
+from vola import signals
+from vola.utils import invalidate_group_cache, invalidate_container_cache, get_container_cache_key, get_group_cache_key, get_plugins_cache_key, defer_cache_invalidation, deferred_transaction, commit_on_success_unless_managed, defer_cache_set, update_positions, expire_view_caches
+
+
+class PositionManager(models.Manager):
+    """
+    Manager for models with a position field
+    """
+
+    def set_positions(self, positions, **filters):
+        """
+        Set positions (a dictionary {pk: position}) with a single query,
+        optionally restricted by filters (e.g. container=1).
+        """
+        return update_positions(self.model, positions, **filters)
+
+    def reorder(self, ids, **filters):
+        """
+        Set positions according to an ordered list of ids
+        """
+        return self.set_positions(dict((pk, i) for i, pk in enumerate(ids)), **filters)
+
 
 class Language(models.Model):
     """
@@ -32,6 +70,8 @@ class Language(models.Model):
     # internal
     create_date = models.DateTimeField(_("Date (Create)"), auto_now_add=True)
     update_date = models.DateTimeField(_("Date (Update)"), auto_now=True)
+
+    objects = PositionManager()
     
     class Meta:
         verbose_name = _("Language")
@@ -44,6 +84,11 @@ class Language(models.Model):
     def __unicode__(self):
         return u"%s" % self.name
 
+    def save(self, *args, **kwargs):
+        super(Language, self).save(*args, **kwargs)
+        # sync denormalized language_code with plugins
+        Plugin.objects.filter(language=self).exclude(language_code=self.name).update(language_code=self.name)
+
 
 class Category(models.Model):
     """
@@ -59,6 +104,8 @@ class Category(models.Model):
     # internal
     create_date = models.DateTimeField(_("Date (Create)"), auto_now_add=True)
     update_date = models.DateTimeField(_("Date (Update)"), auto_now=True)
+
+    objects = PositionManager()
     
     class Meta:
         verbose_name = _("Category")
@@ -72,6 +119,150 @@ class Category(models.Model):
         return u"%s" % self.name
 
 
+class ContainerManager(models.Manager):
+    """
+    Manager for ``Container``
+    """
+
+    def get_cache_key(self, slug):
+        """
+        Returns the cache_key of the container with the given slug
+
+        The cache_key identifies the content of a container (plugins and
+        snapshots are stored with the cache_key). It is switched with the
+        content when transferring a preview, so templatetags need to look
+        it up. The result is cached (see invalidate_container_cache).
+        """
+        key = get_container_cache_key(slug)
+        cache_key = cache.get(key)
+        if cache_key is None:
+            cache_keys = list(self.filter(slug=slug).values_list("cache_key", flat=True)[:1])
+            cache_key = cache_keys[0] if cache_keys else slug
+            cache.set(key, cache_key)
+        return cache_key
+
+    def get_due_previews(self, now=None):
+        """
+        Previews with a transfer_date which has passed (ordered by transfer_date)
+
+        Revisions are excluded (their transfer_date is the date their
+        content has been replaced).
+        """
+        now = now or datetime.datetime.now()
+        return self.filter(preview=True, revision=False, transfer_container__isnull=False, transfer_date__lte=now).order_by("transfer_date", "id")
+
+    def create_previews(self, containers, chunk_size=10, sender=None, progress=None):
+        """
+        Create previews for multiple containers (see Container.create_preview)
+
+        Containers are processed in chunks, one transaction per chunk (unless
+        called within a transaction). Cache invalidations are collected and
+        done once (see defer_cache_invalidation).
+        ``progress`` is called with the number of processed and all containers
+        after each chunk. Returns the previews.
+        """
+        containers = list(containers)
+        previews = []
+        with defer_cache_invalidation():
+            for i in range(0, len(containers), chunk_size):
+                with commit_on_success_unless_managed(using=self.db):
+                    for container in containers[i:i + chunk_size]:
+                        signals.vola_pre_create_preview.send(sender=sender, container=container)
+                        changes = signals.ChangeSet()
+                        preview = container.create_preview(changes=changes)
+                        signals.vola_post_create_preview.send(sender=sender, container=preview, changes=changes)
+                        previews.append(preview)
+                if progress:
+                    progress(min(i + chunk_size, len(containers)), len(containers))
+        return previews
+
+    def transfer_previews(self, previews, chunk_size=10, sender=None, progress=None):
+        """
+        Transfer multiple previews (see Container.transfer), with chunks
+        like create_previews. Only the first preview of each container is
+        transferred, so previews should be ordered newest first ("-id").
+        Returns the containers.
+        """
+        previews = list(previews)
+        containers = []
+        transferred = set()
+        with defer_cache_invalidation():
+            for i in range(0, len(previews), chunk_size):
+                with commit_on_success_unless_managed(using=self.db):
+                    for preview in previews[i:i + chunk_size]:
+                        if preview.transfer_container_id in transferred:
+                            continue
+                        transferred.add(preview.transfer_container_id)
+                        signals.vola_pre_transfer_preview.send(sender=sender, container=preview)
+                        changes = signals.ChangeSet()
+                        container = preview.transfer(changes=changes)
+                        signals.vola_post_transfer_preview.send(sender=sender, container=container, changes=changes)
+                        containers.append(container)
+                if progress:
+                    progress(min(i + chunk_size, len(previews)), len(previews))
+        return containers
+
+    def warm_cache(self, container, groups=None):
+        """
+        Fill the cache for a container (all groups or the given groups)
+
+        Each group gets a new cache_group (see get_cache_key with vola_tags).
+        Plugin lists (see vola_plugin_list) are cached for each language with
+        the new cache_group first, then the cache_key of the containers slug
+        and the cache_groups are switched (with defer_cache_invalidation, when
+        leaving the context manager), so templatetags move from the former
+        cached content to the new cached content.
+        """
+        if groups is None:
+            groups = container.groups.all()
+        slugs = [group.slug for group in groups]
+        languages = [""] + list(Language.objects.values_list("name", flat=True))
+        plugins = {}
+        for plugin in downcast_plugins(Plugin.objects.filter(container=container, group_slug__in=slugs)):
+            plugins.setdefault((plugin.group_slug, plugin.language_code), []).append(plugin)
+        values = {}
+        generations = {}
+        for slug in slugs:
+            key = get_group_cache_key(container.cache_key, slug)
+            current = cache.get(key)
+            generation = random.randint(0, 10000)
+            while generation == current:
+                generation = random.randint(0, 10000)
+            for language in languages:
+                kwargs = {"language": language} if language else {}
+                values[get_plugins_cache_key(generation, "volapluginlist", **kwargs)] = plugins.get((slug, language), [])
+            generations[key] = generation
+        cache.set_many(values)
+        defer_cache_set(get_container_cache_key(container.slug), container.cache_key)
+        for key, generation in generations.items():
+            defer_cache_set(key, generation)
+
+
+def get_container_url(url, slug, language=None):
+    """
+    A page_url (or preview_url) with self.slug and self.language (code)
+    replaced. Urls like reverse("name", args=[...], kwargs={...}) are
+    reversed, with literal arguments only (the url is never evaluated).
+    Returns an empty string if the url cannot be reversed.
+    """
+    url = url.replace("self.slug", slug)
+    if language:
+        url = url.replace("self.language", language)
+    if not url.startswith("reverse"):
+        return url
+    try:
+        call = ast.parse(url, mode="eval").body
+        if not isinstance(call, ast.Call) or getattr(call.func, "id", None) != "reverse" or getattr(call, "starargs", None) or getattr(call, "kwargs", None):
+            return ""
+        if any(keyword.arg not in ("args", "kwargs") for keyword in call.keywords):
+            return ""
+        args = [ast.literal_eval(arg) for arg in call.args]
+        kwargs = dict((keyword.arg, ast.literal_eval(keyword.value)) for keyword in call.keywords)
+        return reverse(*args, **kwargs)
+    except Exception:
+        return ""
+
+
 class Container(models.Model):
     """
     The main ``Container`` model
@@ -93,6 +284,7 @@ class Container(models.Model):
     preview_url = models.CharField(_("Preview URL"), max_length=200, blank=True)
     transfer_date = models.DateTimeField(_("Transfer Date"), blank=True, null=True)
     transfer_container = models.ForeignKey("self", verbose_name=_("Transfer Container"), related_name="previews", blank=True, null=True) # not editable
+    revision = models.BooleanField(_("Revision")) # not editable, the former content of a container (see transfer_preview)
 
     # FIXME: validation script
 
@@ -104,6 +296,8 @@ class Container(models.Model):
     create_date = models.DateTimeField(_("Date (Create)"), auto_now_add=True)
     update_date = models.DateTimeField(_("Date (Update)"), auto_now=True)
 
+    objects = ContainerManager()
+
     class Meta:
         verbose_name = _("Container")
         verbose_name_plural = _("Containers")
@@ -115,15 +309,372 @@ class Container(models.Model):
     def __unicode__(self):
         return u"%s" % self.name
 
+    def __init__(self, *args, **kwargs):
+        super(Container, self).__init__(*args, **kwargs)
+        self._slug_original = self.slug
+
     def save(self, *args, **kwargs):
-        if self.slug:
+        # the cache_key is set once and does not change with the slug
+        if not self.cache_key:
             self.cache_key = self.slug
+            if Container.objects.filter(cache_key=self.cache_key).exists():
+                self.cache_key = "%s_%s" % (self.slug, uuid.uuid4().hex[:8])
         super(Container, self).save(*args, **kwargs)
         if self.preview:
             self.transfer_container = self
         if not self.preview:
             self.transfer_date = self.transfer_container = None
+        # sync denormalized container_slug (the cache_key) with plugins
+        Plugin.objects.filter(container=self).exclude(container_slug=self.cache_key).update(container_slug=self.cache_key)
+        invalidate_container_cache(self._slug_original, self.slug)
+        self._slug_original = self.slug
+
+    def delete(self, *args, **kwargs):
+        slug = self.slug
+        super(Container, self).delete(*args, **kwargs)
+        invalidate_container_cache(slug)
+
+    def get_page_url(self, language=None):
+        """
+        The page_url with self.slug and self.language (code) replaced
+        (see get_container_url)
+        """
+        return get_container_url(self.page_url, self.slug, language)
+
+    def get_page_urls(self):
+        """
+        The page urls of the container for every language,
+        as (url, language code) tuples
+        """
+        if not self.page_url:
+            return []
+        languages = list(Language.objects.values_list("name", flat=True)) or [None]
+        urls = [(self.get_page_url(language), language) for language in languages]
+        return [(url, language) for url, language in urls if url]
+
+    def expire_view_cache(self):
+        """
+        Expire the cached pages of the container (see get_page_urls
+        and expire_view_caches). Returns the deleted keys.
+        """
+        return expire_view_caches(self.get_page_urls())
+
+    def create_preview(self, changes=None):
+        """
+        Create a preview (including permissions, groups and plugins)
+
+        Permissions, groups and plugins are copied with bulk inserts,
+        so the number of queries does not depend on the number of plugins.
+        The plugins of the preview are added to ``changes`` (a ChangeSet,
+        see signals). Returns the new container.
+        """
+        preview = copy.copy(self)
+        preview.pk = None
+        preview.name = "%s (%s)" % (self.name, time.time())
+        preview.slug = preview.cache_key = "%s_%s" % (self.slug, time.time())
+        preview._slug_original = preview.slug
+        preview.preview = True
+        preview.revision = False
+        preview.save()
+        # set new name/slug/cache_key with one update
+        preview.name = "%s (%s)" % (self.name, preview.id)
+        preview.slug = preview.cache_key = "%s_%s" % (self.slug, preview.id)
+        preview.transfer_container = self
+        Container.objects.filter(pk=preview.pk).update(name=preview.name, slug=preview.slug, cache_key=preview.cache_key, transfer_container=self)
+        # new permissions
+        permissions = list(Permission.objects.filter(container=self))
+        for permission in permissions:
+            permission.pk = None
+            permission.container = preview
+        Permission.objects.bulk_create(permissions)
+        increment_permissions_version(Permission)
+        # new groups (mapped by slug, which is unique per container)
+        groups = list(Group.objects.filter(container=self))
+        group_ids = dict((group.slug, group.id) for group in groups)
+        for group in groups:
+            group.pk = None
+            group.container = preview
+        Group.objects.bulk_create(groups)
+        groups = dict((group_ids[group.slug], group) for group in Group.objects.filter(container=preview))
+        # new plugins
+        plugins = Plugin.objects.bulk_copy(downcast_plugins(Plugin.objects.filter(container=self)), preview, groups)
+        if changes is not None:
+            changes.container = preview
+            for plugin in plugins:
+                changes.add(plugin)
+        return preview
+
+    def transfer_preview(self):
+        """
+        Transfer a preview (or a revision) to its container
+
+        Instead of copying groups and plugins, the plugins of the preview
+        and the container are switched (the settings of groups with the same
+        slug are swapped, other groups are moved). The container keeps its
+        id, so permissions, the admin history and relations are kept.
+        Plugins are stored with the cache_key, so the cache_keys of both
+        containers are switched as well and the cached cache_key of the
+        slug is invalidated. The number of queries depends on the number
+        of groups, but the container (and group) of every plugin of both
+        containers is updated, so the switch still writes all plugin rows.
+
+        The preview keeps the former content as a revision (which can be
+        transferred back), unless VOLA_REVISIONS is set (the preview is
+        deleted, see Revision). Older revisions are deleted (see
+        VOLA_TRANSFER_REVISIONS and delete_revisions). Permissions are
+        applied with apply_permissions. Returns the container.
+        """
+        container = self.transfer_container
+        now = datetime.datetime.now()
+        current = dict((group.slug, group) for group in Group.objects.filter(container=container))
+        groups = dict((group.slug, group) for group in Group.objects.filter(container=self))
+        # groups
+        for slug in set(current) & set(groups):
+            values, source = [dict((name, getattr(group, name)) for name in GROUP_MERGE_FIELDS) for group in (current[slug], groups[slug])]
+            if values != source:
+                Group.objects.filter(pk=current[slug].pk).update(update_date=now, **source)
+                Group.objects.filter(pk=groups[slug].pk).update(update_date=now, **values)
+        Group.objects.filter(pk__in=[group.pk for slug, group in current.items() if slug not in groups]).update(container=self)
+        Group.objects.filter(pk__in=[group.pk for slug, group in groups.items() if slug not in current]).update(container=container)
+        # plugins (matched by their cache_key, the instances may be outdated)
+        cache_keys = dict(Container.objects.filter(pk__in=[container.pk, self.pk]).values_list("pk", "cache_key"))
+        Plugin.objects.filter(container=container).update(container=self)
+        Plugin.objects.filter(container=self, container_slug=cache_keys[self.pk]).update(container=container)
+        for slug in set(current) & set(groups):
+            Plugin.objects.filter(container=self, group=current[slug]).update(group=groups[slug])
+            Plugin.objects.filter(container=container, group=groups[slug]).update(group=current[slug])
+        # cache_keys (cache_key is unique)
+        Container.objects.filter(pk=self.pk).update(cache_key="%s_%s" % (cache_keys[self.pk], uuid.uuid4().hex[:8]))
+        Container.objects.filter(pk=container.pk).update(cache_key=cache_keys[self.pk], update_date=now)
+        Container.objects.filter(pk=self.pk).update(cache_key=cache_keys[container.pk], preview=True, revision=True, transfer_date=now, update_date=now)
+        container.cache_key, self.cache_key = cache_keys[self.pk], cache_keys[container.pk]
+        container.update_date = now
+        invalidate_container_cache(container.slug, self.slug)
+        if not self.revision:
+            container.apply_permissions(self)
+        self.revision = True
+        self.transfer_date = self.update_date = now
+        if vola_settings.REVISIONS:
+            self.delete()
+        elif vola_settings.TRANSFER_REVISIONS is not None:
+            container.delete_revisions(vola_settings.TRANSFER_REVISIONS)
+        return container
+
+    def delete_revisions(self, keep=0):
+        """
+        Delete the revisions of the container (see transfer_preview),
+        except for the latest ``keep`` revisions. Returns the deleted revisions.
+        """
+        revisions = list(Container.objects.filter(transfer_container=self, revision=True).order_by("-update_date", "-id")[keep:])
+        for revision in revisions:
+            revision.delete()
+        return revisions
+
+    def apply_permissions(self, preview):
+        """
+        Apply the permissions of a preview to the container
+
+        Permissions are matched by user and group. Permissions of the
+        container changed after the preview has been created are kept,
+        other permissions are changed, added or deleted as with the preview.
+        """
+        current = dict(((permission.user_id, permission.group_id), permission) for permission in Permission.objects.filter(container=self))
+        inserts = []
+        for permission in Permission.objects.filter(container=preview):
+            existing = current.pop((permission.user_id, permission.group_id), None)
+            values = dict((name, getattr(permission, name)) for name in PERMISSION_MERGE_FIELDS)
+            if existing is None:
+                permission.pk = None
+                permission.container = self
+                inserts.append(permission)
+            elif existing.update_date <= preview.create_date and any(getattr(existing, name) != value for name, value in values.items()):
+                Permission.objects.filter(pk=existing.pk).update(**values)
+        Permission.objects.bulk_create(inserts)
+        Permission.objects.filter(pk__in=[permission.pk for permission in current.values() if permission.update_date <= preview.create_date]).delete()
+        increment_permissions_version(Permission)
+
+    def transfer(self, changes=None):
+        """
+        Transfer a preview as configured with VOLA_TRANSFER_DIFF (see
+        merge_preview and transfer_preview), publish snapshots and record
+        a revision (VOLA_SNAPSHOTS, VOLA_REVISIONS). The cache of the
+        changed groups is filled before switching to the new content
+        (see ContainerManager.warm_cache). Changes compared to the former
+        content are added to ``changes``: with merging, changes are taken
+        from merge_preview, otherwise they are loaded when accessed (see
+        load_transfer_changes). Returns the container.
+        """
+        container = self.transfer_container
+        merge = vola_settings.TRANSFER_DIFF and not self.revision
+        if changes is not None and not merge and vola_settings.REVISIONS:
+            # the former plugins are deleted with the preview
+            previous_ids = dict(Plugin.objects.filter(container=container).values_list("uid", "id"))
+        with deferred_transaction():
+            if vola_settings.REVISIONS and not container.revisions.exists():
+                # the content before the first transfer
+                Revision.objects.record(container)
+            if merge:
+                groups = self.merge_preview(changes)
+            else:
+                container = self.transfer_preview()
+                groups = None
+            if vola_settings.SNAPSHOTS:
+                Snapshot.objects.publish_container(container, groups)
+                if not merge:
+                    # snapshots of the former content (now with the preview)
+                    Snapshot.objects.filter(container_slug=self.cache_key).delete()
+            revision = Revision.objects.record(container) if vola_settings.REVISIONS else None
+            Container.objects.warm_cache(container, groups)
+        if changes is not None and not merge:
+            changes.container = container
+            if not vola_settings.REVISIONS:
+                changes.loader = functools.partial(container.load_transfer_changes, former=self)
+            elif revision is not None:
+                changes.loader = functools.partial(container.load_transfer_changes, version=revision.version, previous_ids=previous_ids)
+        return container
+
+    def load_transfer_changes(self, changes, former=None, version=None, previous_ids=None):
+        """
+        Add the changes of transferring a preview with transfer_preview
+        to ``changes`` (see ChangeSet), compared to the former content
+        kept with the preview (``former``) or with the previous
+        revision (with VOLA_REVISIONS, see Revision).
+        """
+        content = Revision.objects.get_content(self)
+        if former is not None:
+            previous = Revision.objects.get_content(former)
+            previous_ids = dict(Plugin.objects.filter(container=former).values_list("uid", "id"))
+        else:
+            previous = Revision.objects.get_state(self, version - 1)
+        Revision.objects.get_changes(self, content, previous, previous_ids, changes)
+
+    def merge_preview(self, changes=None):
+        """
+        Transfer a preview by applying its changes to the container
+
+        Plugins of the preview and the container are matched by ``uid``
+        (which is kept when creating a preview) and groups by slug (see
+        apply_content), so the container (and its plugins) keep their ids
+        and only the caches of changed groups are invalidated. Permissions
+        are applied as with transfer_preview (see apply_permissions) and the
+        preview is deleted. Changed plugins are added to ``changes`` (see
+        apply_content). Returns the changed groups of the container.
+        """
+        container = self.transfer_container
+        groups = list(Group.objects.filter(container=self))
+        plugins = downcast_plugins(Plugin.objects.filter(container=self))
+        with deferred_transaction():
+            changed = container.apply_content(groups, plugins, changes)
+            container.apply_permissions(self)
+            self.delete()
+        return changed
+
+    def apply_content(self, groups, plugins, changes=None):
+        """
+        Change the groups and plugins of the container to the given
+        groups and plugins (e.g. of a preview or a Revision)
 
+        Groups are matched by slug, plugins by ``uid`` (the group of a plugin
+        is given with ``group_slug``). Only changed plugins are updated, new
+        plugins are inserted and removed plugins are deleted. The caches
+        of changed groups are invalidated and the changed plugins are added
+        to ``changes`` (a ChangeSet, see signals). Returns the changed groups.
+        """
+        current = dict((group.slug, group) for group in Group.objects.filter(container=self))
+        groups = dict((group.slug, group) for group in groups)
+        changed = set()
+        # groups
+        for slug, source in groups.items():
+            group = current.get(slug)
+            if group is None:
+                group = copy.copy(source)
+                group.pk = None
+                group.container = self
+                group.save()
+                current[slug] = group
+                changed.add(slug)
+            elif any(getattr(group, name) != getattr(source, name) for name in GROUP_MERGE_FIELDS):
+                for name in GROUP_MERGE_FIELDS:
+                    setattr(group, name, getattr(source, name))
+                group.save()
+                changed.add(slug)
+        removed_groups = [group for slug, group in current.items() if slug not in groups]
+        # plugins
+        existing = dict((plugin.uid, plugin) for plugin in downcast_plugins(Plugin.objects.filter(container=self)))
+        inserts, updates, deletes = [], [], []
+        for source in plugins:
+            plugin = existing.pop(source.uid, None)
+            group = current.get(source.group_slug)
+            if plugin is None or plugin.__class__ is not source.__class__:
+                if plugin is not None:
+                    deletes.append(plugin)
+                source = copy.copy(source)
+                source.group_id = group.pk if group else None
+                inserts.append(source)
+                continue
+            values = {"group_id": group.pk if group else None}
+            for field in plugin._meta.fields:
+                if field.primary_key or field.attname in PLUGIN_MERGE_EXCLUDE:
+                    continue
+                values[field.attname] = getattr(source, field.attname)
+            fields = [name for name, value in values.items() if getattr(plugin, name) != value]
+            if fields:
+                changed.update([plugin.group_slug, source.group_slug])
+                for name, value in values.items():
+                    setattr(plugin, name, value)
+                updates.append(plugin)
+                if changes is not None:
+                    changes.change(plugin, get_changed_fields(plugin, fields))
+        deletes.extend(existing.values())
+        with deferred_transaction():
+            Plugin.objects.bulk_save(updates)
+            if deletes:
+                Plugin.objects.filter(pk__in=[plugin.pk for plugin in deletes]).delete()
+            inserts = Plugin.objects.bulk_copy(inserts, self, dict((group.pk, group) for group in current.values()))
+            for group in removed_groups:
+                group.delete()
+            changed.update(plugin.group_slug for plugin in deletes + inserts)
+            changed.update(group.slug for group in removed_groups)
+            changed.discard("")
+            for slug in changed:
+                invalidate_group_cache(self.cache_key, slug)
+            Container.objects.filter(pk=self.pk).update(update_date=datetime.datetime.now())
+        if changes is not None:
+            changes.container = self
+            for plugin in inserts:
+                changes.add(plugin)
+            for plugin in deletes:
+                changes.delete(plugin)
+        return [current[slug] for slug in sorted(changed) if slug in current and slug in groups]
+
+
+# fields of permissions applied with Container.apply_permissions
+PERMISSION_MERGE_FIELDS = ("manage_container", "manage_preview", "manage_plugins")
+# fields of groups and plugins applied with Container.apply_content
+GROUP_MERGE_FIELDS = ("name", "description", "plugins_include", "plugins_exclude", "validation", "menu", "position")
+PLUGIN_MERGE_EXCLUDE = ("container_id", "container_slug", "group_id", "group_slug", "uid", "create_date", "update_date")
+# fields of plugins not stored with a Revision
+PLUGIN_REVISION_EXCLUDE = ("container_id", "container_slug", "group_id", "create_date", "update_date")
+# lookup fields of plugins reported as changes of the related field (see get_changed_fields)
+PLUGIN_CHANGE_FIELDS = {"group_slug": "group", "language_code": "language"}
+
+
+def invalidate_group(container_slug, group_slug):
+    """
+    Invalidate all cached items for a container (given its slug) and group,
+    e.g. with a custom cache callback. The cache key of a group is based on
+    the cache_key of the container (see ContainerManager.get_cache_key),
+    which differs from the slug after transferring a preview.
+    """
+    invalidate_group_cache(Container.objects.get_cache_key(container_slug), group_slug)
+
+
+def get_changed_fields(plugin, attnames):
+    """
+    Names of the changed editable fields of a plugin (see ChangeSet.change),
+    given the changed attnames
+    """
+    return set(PLUGIN_CHANGE_FIELDS.get(field.attname, field.name) for field in plugin._meta.fields if field.attname in attnames and (field.editable or field.attname in PLUGIN_CHANGE_FIELDS))
 
 class Group(models.Model):
     """
@@ -156,6 +707,8 @@ class Group(models.Model):
     # internal
     create_date = models.DateTimeField(_("Date (Create)"), auto_now_add=True)
     update_date = models.DateTimeField(_("Date (Update)"), auto_now=True)
+
+    objects = PositionManager()
     
     class Meta:
         verbose_name = _("Group")
@@ -173,7 +726,147 @@ class Group(models.Model):
         if self.slug:
             self.cache_key = self.slug
         super(Group, self).save(*args, **kwargs)
-    
+        # sync denormalized group_slug with plugins
+        Plugin.objects.filter(group=self).exclude(group_slug=self.slug).update(group_slug=self.slug)
+        self._plugin_filters = None
+
+    def get_plugin_filters(self):
+        """
+        Returns plugins_include and plugins_exclude as sets
+
+        The sets are parsed once and cached with the instance (until saved).
+        """
+        if getattr(self, "_plugin_filters", None) is None:
+            self._plugin_filters = (
+                frozenset(line.strip() for line in self.plugins_include.splitlines() if line.strip()),
+                frozenset(line.strip() for line in self.plugins_exclude.splitlines() if line.strip()),
+            )
+        return self._plugin_filters
+
+    def allows_plugin(self, app_label, model_name):
+        """
+        True if a plugin (app_label.model_name) is allowed with this group
+        """
+        include, exclude = self.get_plugin_filters()
+        names = ("%s.%s" % (app_label, model_name), "%s.*" % app_label)
+        if include and include.isdisjoint(names):
+            return False
+        return exclude.isdisjoint(names)
+
+
+class PluginManager(PositionManager):
+    """
+    Manager for ``Plugin``, with bulk operations
+    """
+
+    def set_positions(self, positions, **filters):
+        """
+        Set positions with a single query (see ``PositionManager``) and
+        invalidate the affected groups once.
+        """
+        if not positions:
+            return 0
+        with deferred_transaction(using=self.db):
+            queryset = self.filter(pk__in=positions.keys(), **filters).order_by()
+            for container_slug, group_slug in queryset.values_list("container_slug", "group_slug").distinct():
+                invalidate_group_cache(container_slug, group_slug)
+            rows = update_positions(self.model, positions, **filters)
+        return rows
+
+    def bulk_save(self, plugins):
+        """
+        Save a list of plugins
+
+        Containers, groups and languages (if needed for updating the
+        plugins lookup fields) are fetched with one query each. Group caches
+        are invalidated once per group, after the transaction has been committed.
+        """
+        plugins = list(plugins)
+        changed = [plugin for plugin in plugins if plugin.lookup_fields_changed()]
+        containers = Container.objects.in_bulk(set(plugin.container_id for plugin in changed))
+        groups = Group.objects.in_bulk(set(plugin.group_id for plugin in changed if plugin.group_id))
+        languages = Language.objects.in_bulk(set(plugin.language_id for plugin in changed if plugin.language_id))
+        for plugin in changed:
+            plugin.container = containers[plugin.container_id]
+            if plugin.group_id:
+                plugin.group = groups[plugin.group_id]
+            if plugin.language_id:
+                plugin.language = languages[plugin.language_id]
+        with deferred_transaction(using=self.db):
+            for plugin in plugins:
+                plugin.save(using=self.db)
+        return plugins
+
+    def bulk_copy(self, plugins, container, groups=None):
+        """
+        Copy (downcasted) plugins to ``container`` with bulk inserts
+
+        ``groups`` maps the ids of the original groups to the new groups.
+        The parent rows are inserted first, the new ids are fetched based
+        on ``uid`` and then the rows of each subclass are inserted. Please
+        note that ``save`` is not called and no signals are sent. Returns
+        the copies (with their new ids).
+        """
+        groups = groups or {}
+        copies = []
+        uids = set()
+        for plugin in plugins:
+            plugin = copy.copy(plugin)
+            if not plugin.uid or plugin.uid in uids:
+                plugin.uid = uuid.uuid4().hex
+            uids.add(plugin.uid)
+            plugin.container = container
+            plugin.container_slug = container.cache_key
+            if plugin.group_id:
+                plugin.group = groups[plugin.group_id]
+                plugin.group_slug = plugin.group.slug
+            copies.append(plugin)
+        self.bulk_create([Plugin(**dict((field.attname, getattr(plugin, field.attname)) for field in Plugin._meta.local_fields if field.attname != "id")) for plugin in copies])
+        ids = dict(self.filter(container=container).values_list("uid", "id"))
+        # subclass rows, ordered from the top of the inheritance chain
+        tables = {}
+        for plugin in copies:
+            plugin.id = ids[plugin.uid]
+            model = plugin._meta.concrete_model
+            if model is Plugin:
+                continue
+            for parent in [model] + list(model._meta.get_parent_list()):
+                for ptr in parent._meta.parents.values():
+                    setattr(plugin, ptr.attname, ids[plugin.uid])
+                if parent is not Plugin:
+                    tables.setdefault(parent, []).append(plugin)
+        for model in sorted(tables, key=lambda m: len(m._meta.get_parent_list())):
+            # bulk_create does not support inherited models
+            objs = tables[model]
+            fields = model._meta.local_fields
+            ops = connections[self.db].ops
+            if hasattr(ops, "bulk_batch_size"):
+                batch_size = max(ops.bulk_batch_size(fields, objs), 1)
+            else:
+                # Django 1.4, limited by the number of query parameters with sqlite
+                batch_size = max(999 // len(fields), 1)
+            for i in range(0, len(objs), batch_size):
+                model._base_manager._insert(objs[i:i + batch_size], fields=fields, using=self.db)
+        return copies
+
+    def bulk_update(self, plugins, **kwargs):
+        """
+        Update plugins (a queryset or a list of plugins) with a single query
+
+        Only use this with non-relational fields, since the plugins
+        lookup fields are not updated. Returns the number of updated rows.
+        """
+        if isinstance(plugins, models.query.QuerySet):
+            queryset = plugins
+        else:
+            queryset = self.filter(pk__in=[plugin.pk for plugin in plugins])
+        kwargs.setdefault("update_date", datetime.datetime.now())
+        with deferred_transaction(using=self.db):
+            for container_slug, group_slug in queryset.order_by().values_list("container_slug", "group_slug").distinct():
+                invalidate_group_cache(container_slug, group_slug)
+            rows = queryset.update(**kwargs)
+        return rows
+
 
 class Plugin(models.Model):
     """
@@ -188,6 +881,18 @@ class Plugin(models.Model):
     slug = models.SlugField(_("Slug"), max_length=200, blank=True)
     language = models.ForeignKey(Language, related_name="plugins", blank=True, null=True)
 
+    # denormalized container cache_key, group slug and language (see save),
+    # used with templatetags in order to query plugins without joins
+    container_slug = models.SlugField(_("Container Slug"), max_length=200, blank=True, db_index=False, editable=False)
+    group_slug = models.SlugField(_("Group Slug"), max_length=200, blank=True, db_index=False, editable=False)
+    language_code = models.CharField(_("Language Code"), max_length=7, blank=True, editable=False)
+
+    # stable identity, kept when copying a plugin to a preview
+    uid = models.CharField(_("UID"), max_length=32, blank=True, db_index=True, editable=False)
+
+    # content (JSON), only used with ContentPlugin
+    content = models.TextField(_("Content"), blank=True, editable=False)
+
     # plugin meta information
     app_label = models.CharField(_("App Label"), max_length=100, blank=True)
     model_name = models.CharField(_("Model Name"), max_length=100, blank=True)
@@ -200,11 +905,15 @@ class Plugin(models.Model):
     # internal
     create_date = models.DateTimeField(_("Date (Create)"), auto_now_add=True)
     update_date = models.DateTimeField(_("Date (Update)"), auto_now=True)
+
+    objects = PluginManager()
     
     class Meta:
         verbose_name = _("Plugin")
         verbose_name_plural = _("Plugins")
         ordering = ["position"]
+        # index on container_slug, group_slug and language_code is created
+        # with migration 0002 (index_together requires Django 1.5)
 
     def __str__(self):
         return "%s" % self.id
@@ -212,11 +921,47 @@ class Plugin(models.Model):
     def __unicode__(self):
         return u"%s" % self.id
 
+    def __init__(self, *args, **kwargs):
+        super(Plugin, self).__init__(*args, **kwargs)
+        self._set_lookup_original()
+
     @property
     def get_plugin(self):
         if self.model_name:
-            return eval("self."+self.model_name)
+            return self.downcast()
         return None
+
+    def downcast(self):
+        """
+        Returns the plugin as an instance of its subclass
+
+        The subclass is looked up with the plugin registry (based
+        on ``app_label`` and ``model_name``) and the result is cached
+        with the instance. See ``downcast_plugins`` for lists of plugins.
+        """
+        try:
+            return self._downcast_cache
+        except AttributeError:
+            pass
+        model = get_plugin_model(self.app_label, self.model_name)
+        if model is None or isinstance(self, model):
+            plugin = self
+        elif model._meta.concrete_model is self._meta.concrete_model:
+            plugin = self._copy_as(model)
+        else:
+            plugin = model._base_manager.get(pk=self.pk)
+        self._downcast_cache = plugin
+        return plugin
+
+    def _copy_as(self, model):
+        """
+        Returns a copy of the plugin as an instance of a proxy model
+        (e.g. a ``ContentPlugin``), without querying the database.
+        """
+        plugin = model(**dict((field.attname, getattr(self, field.attname)) for field in self._meta.fields))
+        plugin._state.adding = self._state.adding
+        plugin._state.db = self._state.db
+        return plugin
     
     @property
     def template_name(self):
@@ -227,6 +972,23 @@ class Plugin(models.Model):
         """
         return self.model_name
 
+    def serialize(self):
+        """
+        Returns the plugin (including the fields of its subclass) as a
+        JSON serializable dictionary, see ``deserialize_plugin``.
+        """
+        fields = {}
+        for field in self._meta.fields:
+            value = field._get_val_from_obj(self)
+            if not is_protected_type(value):
+                value = field.value_to_string(self)
+            fields[field.attname] = value
+        return {
+            "app_label": self.app_label,
+            "model_name": self.model_name,
+            "fields": fields,
+        }
+
     def get_template(self, context=None, *args, **kwargs):
         """
         Loading template for a plugin
@@ -271,16 +1033,590 @@ class Plugin(models.Model):
     def save(self, *args, **kwargs):
         """
         Set ``app_label`` and ``model_name`` when saving a plugin
+
+        Container cache_key, group slug and language code are copied to the
+        plugin, so that templatetags are able to query a single table.
         """
         self.app_label = self._meta.app_label
         self.model_name = self.__class__.__name__.lower()
+        if not self.id:
+            self.uid = uuid.uuid4().hex
+        original_group_slugs = (self._lookup_original[3], self._lookup_original[4])
+        if self.lookup_fields_changed():
+            self.container_slug = self.container.cache_key
+            self.group_slug = self.group.slug if self.group_id else ""
+            self.language_code = self.language.name if self.language_id else ""
         super(Plugin, self).save(*args, **kwargs)
-        # clear cache_group
+        # clear cache_group (and the former cache_group if the plugin has been moved)
+        invalidate_group_cache(self.container_slug, self.group_slug)
+        if original_group_slugs != (self.container_slug, self.group_slug):
+            invalidate_group_cache(*original_group_slugs)
+        self._set_lookup_original()
+
+    def delete(self, *args, **kwargs):
+        container_slug, group_slug = self.container_slug, self.group_slug
+        super(Plugin, self).delete(*args, **kwargs)
+        invalidate_group_cache(container_slug, group_slug)
+
+    def _set_lookup_original(self):
+        self._lookup_original = (self.container_id, self.group_id, self.language_id, self.container_slug, self.group_slug)
+
+    def lookup_fields_changed(self):
+        """
+        True if container_slug, group_slug and language_code need to be updated
+
+        With plugins loaded from the database, related objects only need to be
+        fetched if container, group or language have been changed.
+        """
+        if self._state.adding or not self.container_slug:
+            return True
+        return self._lookup_original[:3] != (self.container_id, self.group_id, self.language_id)
+
+
+# PLUGIN REGISTRY
+# Subclasses of ``Plugin`` are registered when the model class is
+# prepared, keyed by (app_label, model_name).
+plugin_registry = {}
+
+
+def register_plugin(sender, **kwargs):
+    if issubclass(sender, Plugin):
+        plugin_registry[(sender._meta.app_label, sender.__name__.lower())] = sender
+
+class_prepared.connect(register_plugin)
+register_plugin(Plugin)
+
+
+def get_plugin_model(app_label, model_name):
+    """
+    Returns the plugin model for ``app_label`` and ``model_name`` (or None)
+    """
+    return plugin_registry.get((app_label, model_name), None)
+
+
+class ContentField(object):
+    """
+    A field of a ``ContentPlugin``, stored with the plugins ``content``
+
+    The form field class (and its arguments) is used for
+    converting values and with the admin interface.
+    """
+
+    def __init__(self, form_class=forms.CharField, default=None, **kwargs):
+        self.form_class = form_class
+        self.default = default
+        self.kwargs = kwargs
+        self.name = None
+        self._formfield = None
+
+    def contribute_to_class(self, cls, name):
+        self.name = name
+        self.kwargs.setdefault("label", capfirst(name.replace("_", " ")))
+        cls._content_fields = list(getattr(cls, "_content_fields", [])) + [self]
+        setattr(cls, name, self)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        content = instance.get_content()
+        if self.name not in content:
+            return self.default
+        return self.to_python(content[self.name])
+
+    def __set__(self, instance, value):
+        instance.get_content()[self.name] = value
+
+    def formfield(self, **kwargs):
+        defaults = dict(self.kwargs)
+        defaults.update(kwargs)
+        return self.form_class(**defaults)
+
+    def to_python(self, value):
+        if self._formfield is None:
+            self._formfield = self.formfield()
         try:
-            cache_group_key = "%s-%s" % (self.container.slug, self.group.slug)
-            cache.delete(cache_group_key)
-        except:
-            pass
+            return self._formfield.to_python(value)
+        except ValidationError:
+            return value
+
+
+class ContentPlugin(Plugin):
+    """
+    Plugin without a table of its own
+
+    Fields are defined with ``ContentField`` and stored as JSON with
+    ``Plugin.content``. Subclasses need to be proxy models:
+
+    class PluginText(ContentPlugin):
+        title = ContentField(forms.CharField, max_length=200)
+        body = ContentField(forms.CharField, widget=forms.Textarea)
+
+        class Meta:
+            proxy = True
+    """
+
+    _content_fields = []
+
+    class Meta:
+        proxy = True
+
+    def __init__(self, *args, **kwargs):
+        values = {}
+        for field in self._content_fields:
+            if field.name in kwargs:
+                values[field.name] = kwargs.pop(field.name)
+        super(ContentPlugin, self).__init__(*args, **kwargs)
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def __copy__(self):
+        """
+        Copies do not share the decoded content (see get_content), so
+        changing the content fields of a copy does not change the original
+        """
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        if "_content_cache" in self.__dict__:
+            obj._content_cache = copy.deepcopy(self._content_cache)
+        return obj
+
+    def get_content(self):
+        """
+        Returns the (decoded) content as a dictionary
+        """
+        try:
+            return self._content_cache
+        except AttributeError:
+            self._content_cache = json.loads(self.content) if self.content else {}
+            return self._content_cache
+
+    def save(self, *args, **kwargs):
+        self.content = json.dumps(self.get_content(), cls=DjangoJSONEncoder)
+        super(ContentPlugin, self).save(*args, **kwargs)
+
+
+def downcast_plugins(plugins):
+    """
+    Returns a list of plugins as instances of their subclasses
+
+    Instead of one query per plugin (see ``Plugin.downcast``), we only
+    need one query for each plugin model.
+    """
+    plugins = list(plugins)
+    pks = {}
+    for plugin in plugins:
+        if hasattr(plugin, "_downcast_cache"):
+            continue
+        model = get_plugin_model(plugin.app_label, plugin.model_name)
+        if model is None or isinstance(plugin, model):
+            plugin._downcast_cache = plugin
+        elif model._meta.concrete_model is plugin._meta.concrete_model:
+            plugin._downcast_cache = plugin._copy_as(model)
+        else:
+            pks.setdefault(model, []).append(plugin.pk)
+    for model, pk_list in pks.items():
+        objects = model._base_manager.in_bulk(pk_list)
+        for plugin in plugins:
+            if plugin.pk in objects:
+                plugin._downcast_cache = objects[plugin.pk]
+    return [plugin.downcast() for plugin in plugins]
+
+
+def deserialize_plugin(data):
+    """
+    Returns an (unsaved) plugin instance based on ``Plugin.serialize``
+    or None, if the plugin model is not available.
+    """
+    model = get_plugin_model(data["app_label"], data["model_name"])
+    if model is None:
+        return None
+    values = {}
+    for field in model._meta.fields:
+        if field.attname in data["fields"]:
+            values[field.attname] = field.to_python(data["fields"][field.attname])
+    plugin = model(**values)
+    plugin._state.adding = False
+    return plugin
+
+
+class SnapshotManager(models.Manager):
+    """
+    Manager for ``Snapshot``, used for publishing and reading content
+    """
+
+    def publish(self, container, group, language=None):
+        """
+        Publish the plugins of a group (for a language) with a new snapshot,
+        former versions are deleted
+        """
+        language_code = language.name if language else ""
+        plugins = downcast_plugins(Plugin.objects.filter(container=container, group=group, language=language))
+        latest = self.filter(container_slug=container.cache_key, group_slug=group.slug, language_code=language_code)[:1]
+        version = latest[0].version + 1 if latest else 1
+        snapshot = self.create(
+            container_slug=container.cache_key,
+            group_slug=group.slug,
+            language_code=language_code,
+            version=version,
+            data=json.dumps([plugin.serialize() for plugin in plugins], cls=DjangoJSONEncoder),
+        )
+        self.filter(container_slug=container.cache_key, group_slug=group.slug, language_code=language_code, version__lt=version).delete()
+        invalidate_group_cache(container.cache_key, group.slug)
+        return snapshot
+
+    def publish_container(self, container, groups=None):
+        """
+        Publish all groups (or the given groups) of a container (for all
+        languages). With all groups, snapshots of removed groups are deleted.
+        """
+        languages = [None] + list(Language.objects.all())
+        snapshots = []
+        with deferred_transaction(using=self.db):
+            if groups is None:
+                groups = list(container.groups.all())
+                self.filter(container_slug=container.cache_key).exclude(group_slug__in=[group.slug for group in groups]).delete()
+            for group in groups:
+                for language in languages:
+                    snapshots.append(self.publish(container, group, language))
+        return snapshots
+
+    def get_plugins(self, container_slug, group_slug, language_code=""):
+        """
+        Returns the plugins of the latest snapshot or None,
+        if the content has not been published yet.
+        """
+        latest = self.filter(container_slug=container_slug, group_slug=group_slug, language_code=language_code or "")[:1]
+        if not latest:
+            return None
+        return latest[0].get_plugins()
+
+
+class Snapshot(models.Model):
+    """
+    Published content of a ``Group`` (for a language)
+
+    A snapshot stores the plugins (with the fields of their subclasses)
+    as JSON. Snapshots are never changed, publishing content creates
+    a new version.
+    """
+
+    container_slug = models.SlugField(_("Container Slug"), max_length=200, db_index=False) # cache_key of the container
+    group_slug = models.SlugField(_("Group Slug"), max_length=200, db_index=False)
+    language_code = models.CharField(_("Language Code"), max_length=7, blank=True)
+    version = models.PositiveIntegerField(_("Version"))
+    data = models.TextField(_("Data"))
+
+    # internal
+    create_date = models.DateTimeField(_("Date (Create)"), auto_now_add=True)
+
+    objects = SnapshotManager()
+
+    class Meta:
+        verbose_name = _("Snapshot")
+        verbose_name_plural = _("Snapshots")
+        ordering = ["-version"]
+        unique_together = (("container_slug", "group_slug", "language_code", "version"),)
+
+    def __str__(self):
+        return "%s-%s-%s (%s)" % (self.container_slug, self.group_slug, self.language_code, self.version)
+
+    def __unicode__(self):
+        return u"%s-%s-%s (%s)" % (self.container_slug, self.group_slug, self.language_code, self.version)
+
+    def get_plugins(self):
+        """
+        Returns a list of (unsaved) plugin instances
+        """
+        plugins = [deserialize_plugin(data) for data in json.loads(self.data)]
+        return [plugin for plugin in plugins if plugin is not None]
+
+
+class RevisionManager(models.Manager):
+    """
+    Manager for ``Revision``, used for recording and restoring content
+    """
+
+    def get_content(self, container):
+        """
+        The groups and plugins of a container as a JSON serializable
+        dictionary (groups by slug, plugins by uid)
+        """
+        groups = {}
+        for group in Group.objects.filter(container=container):
+            groups[group.slug] = dict((name, getattr(group, name)) for name in GROUP_MERGE_FIELDS)
+        plugins = {}
+        for plugin in downcast_plugins(Plugin.objects.filter(container=container)):
+            data = plugin.serialize()
+            for field in plugin._meta.fields:
+                if field.primary_key or field.attname in PLUGIN_REVISION_EXCLUDE:
+                    data["fields"].pop(field.attname, None)
+            plugins[plugin.uid] = data
+        return json.loads(json.dumps({"groups": groups, "plugins": plugins}, cls=DjangoJSONEncoder))
+
+    def get_delta(self, content, previous):
+        """
+        Changes from previous to content (changed and inserted groups or
+        plugins, changed fields of existing plugins and deletes)
+        """
+        delta = {"groups": {}, "changed": {}, "inserted": {}, "deleted": []}
+        for slug, fields in content["groups"].items():
+            if previous["groups"].get(slug) != fields:
+                delta["groups"][slug] = fields
+        for slug in previous["groups"]:
+            if slug not in content["groups"]:
+                delta["groups"][slug] = None
+        for uid, data in content["plugins"].items():
+            original = previous["plugins"].get(uid)
+            if original is None or (original["app_label"], original["model_name"]) != (data["app_label"], data["model_name"]):
+                delta["inserted"][uid] = data
+                continue
+            fields = dict((name, value) for name, value in data["fields"].items() if original["fields"].get(name) != value)
+            if fields:
+                delta["changed"][uid] = fields
+        delta["deleted"] = [uid for uid in previous["plugins"] if uid not in content["plugins"]]
+        return delta
+
+    def get_changes(self, container, content, previous, previous_ids, changes=None):
+        """
+        Changes from previous content to content (see get_content) of a
+        container as a ChangeSet (see signals)
+
+        ``previous_ids`` maps the uids of the previous plugins to their
+        ids, which are used with deleted plugins. Only editable fields
+        are listed with changed plugins.
+        """
+        delta = self.get_delta(content, previous)
+        if changes is None:
+            changes = signals.ChangeSet()
+        changes.container = container
+        ids = dict(Plugin.objects.filter(container=container).values_list("uid", "id"))
+        for uid, data in sorted(delta["inserted"].items()):
+            plugin = deserialize_plugin(data)
+            if plugin is not None:
+                plugin.pk = ids.get(uid)
+                changes.add(plugin)
+        for uid, fields in sorted(delta["changed"].items()):
+            plugin = deserialize_plugin(content["plugins"][uid])
+            if plugin is not None:
+                plugin.pk = ids.get(uid)
+                changes.change(plugin, get_changed_fields(plugin, fields))
+        for uid in sorted(delta["deleted"]):
+            plugin = deserialize_plugin(previous["plugins"][uid])
+            if plugin is not None:
+                plugin.pk = previous_ids.get(uid)
+                changes.delete(plugin)
+        return changes
+
+    def apply_delta(self, content, delta):
+        for slug, fields in delta["groups"].items():
+            if fields is None:
+                content["groups"].pop(slug, None)
+            else:
+                content["groups"][slug] = fields
+        for uid, fields in delta["changed"].items():
+            content["plugins"][uid]["fields"].update(fields)
+        content["plugins"].update(delta["inserted"])
+        for uid in delta["deleted"]:
+            content["plugins"].pop(uid, None)
+        return content
+
+    def get_state(self, container, version):
+        """
+        Rebuild the content of a revision, based on the latest checkpoint
+        and the following deltas (two queries)
+        """
+        checkpoint = self.filter(container=container, checkpoint=True, version__lte=version)[:1]
+        if not checkpoint:
+            raise self.model.DoesNotExist
+        checkpoint = checkpoint[0]
+        content = json.loads(checkpoint.data)
+        for revision in self.filter(container=container, version__gt=checkpoint.version, version__lte=version).order_by("version"):
+            content = self.apply_delta(content, json.loads(revision.data))
+        return content
+
+    def record(self, container):
+        """
+        Record the content of a container (if it has been changed) with a
+        new revision. Every VOLA_REVISION_CHECKPOINT revisions (and with the
+        first revision), the full content is stored. Returns the revision or
+        None if nothing has been changed.
+
+        The container row is locked while the next version is taken, so
+        concurrent records of a container are serialized.
+        """
+        with commit_on_success_unless_managed(using=self.db):
+            list(Container.objects.using(self.db).select_for_update().filter(pk=container.pk).values_list("pk", flat=True))
+            content = self.get_content(container)
+            latest = self.filter(container=container)[:1]
+            version = latest[0].version + 1 if latest else 1
+            if latest:
+                delta = self.get_delta(content, self.get_state(container, latest[0].version))
+                if not any(delta.values()):
+                    return None
+            checkpoint = not latest or (version - 1) % max(vola_settings.REVISION_CHECKPOINT, 1) == 0
+            return self.create(
+                container=container,
+                version=version,
+                checkpoint=checkpoint,
+                data=json.dumps(content if checkpoint else delta),
+            )
+
+    def rollback(self, container, version):
+        """
+        Restore the content of a revision with a container (see
+        Container.apply_content) and record the restored content as
+        a new revision. Returns the changed groups.
+        """
+        content = self.get_state(container, version)
+        groups = [Group(slug=slug, **fields) for slug, fields in content["groups"].items()]
+        plugins = [deserialize_plugin(data) for data in content["plugins"].values()]
+        with deferred_transaction(using=self.db):
+            changed = container.apply_content(groups, [plugin for plugin in plugins if plugin is not None])
+            self.record(container)
+        return changed
+
+
+class Revision(models.Model):
+    """
+    A published state of a ``Container``
+
+    Revisions are stored as deltas against the previous revision (changed
+    fields of plugins, inserts and deletes) with periodic checkpoints
+    storing the full content (see VOLA_REVISION_CHECKPOINT).
+    """
+
+    container = models.ForeignKey(Container, related_name="revisions", db_index=False) # indexed with unique_together
+    version = models.PositiveIntegerField(_("Version"))
+    checkpoint = models.BooleanField(_("Checkpoint"))
+    data = models.TextField(_("Data"))
+
+    # internal
+    create_date = models.DateTimeField(_("Date (Create)"), auto_now_add=True)
+
+    objects = RevisionManager()
+
+    class Meta:
+        verbose_name = _("Revision")
+        verbose_name_plural = _("Revisions")
+        ordering = ["-version"]
+        unique_together = (("container", "version"),)
+
+    def __str__(self):
+        return "%s (%s)" % (self.container_id, self.version)
+
+    def __unicode__(self):
+        return u"%s (%s)" % (self.container_id, self.version)
+
+
+class EventManager(models.Manager):
+    """
+    Manager for ``Event``, used for recording and processing events
+    """
+
+    def record(self, name, container, group=None, changes=None):
+        return self.create(
+            name=name,
+            container_slug=container.slug,
+            group_slug=group.slug if group else "",
+            data=json.dumps(changes.as_dict() if changes is not None else {}, cls=DjangoJSONEncoder),
+        )
+
+    def get_pending(self):
+        """
+        Events which have not been processed (and have not failed
+        more than VOLA_EVENT_RETRIES times), ordered by id
+        """
+        return self.filter(process_date__isnull=True, attempts__lt=vola_settings.EVENT_RETRIES).order_by("id")
+
+    def process(self, events, handlers):
+        """
+        Call handlers with events, once per container and group
+
+        Events of a container and group are handled together (handlers
+        are called with a list of events), so that multiple changes only
+        result in one purge. If a handler raises an exception, the events
+        are retried later (so handlers should be idempotent). Returns the
+        number of processed events.
+        """
+        batches = {}
+        for event in events:
+            batches.setdefault((event.container_slug, event.group_slug), []).append(event)
+        processed = 0
+        now = datetime.datetime.now()
+        for key in sorted(batches, key=lambda k: batches[k][0].pk):
+            batch = batches[key]
+            error = ""
+            for handler in handlers:
+                try:
+                    handler(batch)
+                except Exception:
+                    error = traceback.format_exc()
+                    logging.getLogger("vola.events").exception("Handling events of %s-%s failed", *key)
+                    break
+            queryset = self.filter(pk__in=[event.pk for event in batch])
+            if error:
+                queryset.update(attempts=F("attempts") + 1, error=error)
+            else:
+                queryset.update(attempts=F("attempts") + 1, error="", process_date=now)
+                processed += len(batch)
+        return processed
+
+
+class Event(models.Model):
+    """
+    A change of a ``Container``, recorded with the vola post signals
+
+    Events are written with the transaction of the change (see VOLA_EVENTS)
+    and processed afterwards (see the management command vola_process_events),
+    so that slow invalidation (e.g. purging caches) does not delay saving.
+    """
+
+    name = models.CharField(_("Name"), max_length=50)
+    container_slug = models.SlugField(_("Container Slug"), max_length=200)
+    group_slug = models.SlugField(_("Group Slug"), max_length=200, blank=True, db_index=False)
+    data = models.TextField(_("Data"), blank=True)
+    attempts = models.PositiveIntegerField(_("Attempts"), default=0)
+    error = models.TextField(_("Error"), blank=True)
+
+    # internal
+    create_date = models.DateTimeField(_("Date (Create)"), auto_now_add=True)
+    process_date = models.DateTimeField(_("Date (Process)"), blank=True, null=True, db_index=True)
+
+    objects = EventManager()
+
+    class Meta:
+        verbose_name = _("Event")
+        verbose_name_plural = _("Events")
+        ordering = ["id"]
+
+    def __str__(self):
+        return "%s %s-%s" % (self.name, self.container_slug, self.group_slug)
+
+    def __unicode__(self):
+        return u"%s %s-%s" % (self.name, self.container_slug, self.group_slug)
+
+    def get_data(self):
+        """
+        The changes of the event (see signals.ChangeSet.as_dict)
+        """
+        return json.loads(self.data) if self.data else {}
+
+
+class PermissionManager(models.Manager):
+    """
+    Manager for ``Permission``
+    """
+
+    def get_flags(self, user, container):
+        """
+        Returns (manage_container, manage_preview, manage_plugins) of a user
+        (including the users groups) for a container with a single query
+        """
+        flags = (False, False, False)
+        queryset = self.filter(Q(user=user) | Q(group__in=user.groups.all()), container=container)
+        for row in queryset.values_list("manage_container", "manage_preview", "manage_plugins"):
+            flags = tuple(flag or value for flag, value in zip(flags, row))
+        return flags
 
 
 class Permission(models.Model):
@@ -315,6 +1651,8 @@ class Permission(models.Model):
     create_date = models.DateTimeField(_("Date (Create)"), auto_now_add=True)
     update_date = models.DateTimeField(_("Date (Update)"), auto_now=True)
 
+    objects = PermissionManager()
+
     def __str__(self):
         if self.user:
             return "%s" % self.user
@@ -333,3 +1671,76 @@ class Permission(models.Model):
     def save(self, *args, **kwargs):
         super(Permission, self).save(*args, **kwargs)
 
+
+# PERMISSIONS VERSION
+# Incremented whenever a ``Permission`` is saved or deleted, so that
+# permissions memoized with a request (see ContainerAdmin.get_permissions)
+# are not used after being changed.
+_permissions_version = [0]
+
+
+def get_permissions_version():
+    return _permissions_version[0]
+
+
+def increment_permissions_version(sender, **kwargs):
+    _permissions_version[0] += 1
+
+post_save.connect(increment_permissions_version, sender=Permission)
+post_delete.connect(increment_permissions_version, sender=Permission)
+
+
+# EVENTS
+# The post signals are recorded with an ``Event`` if VOLA_EVENTS is set.
+# Receivers are called within the transaction of the change.
+EVENT_SIGNALS = {
+    signals.vola_post_edit_plugins: "edit",
+    signals.vola_post_create_preview: "create_preview",
+    signals.vola_post_transfer_preview: "transfer",
+}
+
+
+def record_event(sender, signal=None, container=None, group=None, changes=None, **kwargs):
+    if vola_settings.EVENTS:
+        Event.objects.record(EVENT_SIGNALS[signal], container, group, changes)
+
+for signal, name in EVENT_SIGNALS.items():
+    signal.connect(record_event, dispatch_uid="vola_event_%s" % name)
+
+
+# PUBLISHING
+# Snapshots are published and revisions are recorded with the edit signal,
+# which is sent with every change of plugins with the admin interface
+# (without a group, all groups are published). Transferring previews
+# publishes with Container.transfer, before the cache is filled.
+def publish_content(sender, container=None, group=None, **kwargs):
+    if container.preview:
+        return
+    if vola_settings.SNAPSHOTS:
+        Snapshot.objects.publish_container(container, [group] if group else None)
+    if vola_settings.REVISIONS:
+        Revision.objects.record(container)
+
+signals.vola_post_edit_plugins.connect(publish_content, dispatch_uid="vola_publish_content")
+
+
+# VIEW CACHE
+# The cached pages of a container are expired with editing plugins
+# and transferring previews (see VOLA_EXPIRE_VIEW_CACHE). With VOLA_EVENTS,
+# pages are expired when processing events (see expire_view_cache_events).
+def expire_container_view_cache(sender, container=None, **kwargs):
+    if vola_settings.EXPIRE_VIEW_CACHE and not vola_settings.EVENTS and not container.preview:
+        container.expire_view_cache()
+
+
+def expire_view_cache_events(events):
+    """
+    Event handler expiring the cached pages of a container with editing
+    plugins and transferring previews (see vola_process_events)
+    """
+    if any(event.name in ("edit", "transfer") for event in events):
+        for container in Container.objects.filter(slug=events[0].container_slug, preview=False):
+            container.expire_view_cache()
+
+signals.vola_post_edit_plugins.connect(expire_container_view_cache, dispatch_uid="vola_expire_view_cache_edit")
+signals.vola_post_transfer_preview.connect(expire_container_view_cache, dispatch_uid="vola_expire_view_cache_transfer")
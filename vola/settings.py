@@ -1,4 +1,44 @@
 # coding: utf-8
 
 # DJANGO IMPORTS
-#from django.conf import settings
\ No newline at end of file
+from django.conf import settings
+
+# Read published snapshots (see Snapshot) with templatetags instead of
+# plugins. Content is published with every change of plugins (see the
+# vola_post_edit_plugins signal) and with transferring previews (or with the
+# management command vola_publish). Former snapshots are deleted.
+SNAPSHOTS = getattr(settings, "VOLA_SNAPSHOTS", False)
+
+# Groups with more plugins than LAZY_PLUGINS list plugin summaries with the
+# admin interface and load plugin forms on demand (0 loads all forms).
+LAZY_PLUGINS = getattr(settings, "VOLA_LAZY_PLUGINS", 0)
+
+# Transfer previews by applying their changes to the container (see
+# Container.merge_preview) instead of switching the content of the preview
+# and the container (the former content is kept as a revision, unless
+# REVISIONS is set, see Container.transfer_preview).
+TRANSFER_DIFF = getattr(settings, "VOLA_TRANSFER_DIFF", False)
+
+# Number of revisions kept with each container when switching content (see
+# Container.transfer_preview), older revisions are deleted with the transfer.
+# With None, revisions are kept until deleted with vola_delete_revisions.
+TRANSFER_REVISIONS = getattr(settings, "VOLA_TRANSFER_REVISIONS", 1)
+
+# Record revisions of containers when publishing content (see Revision).
+# The full content is stored with every REVISION_CHECKPOINT revisions,
+# other revisions are stored as deltas against the previous revision.
+REVISIONS = getattr(settings, "VOLA_REVISIONS", False)
+REVISION_CHECKPOINT = getattr(settings, "VOLA_REVISION_CHECKPOINT", 10)
+
+# Record the vola post signals with an Event (within the transaction of the
+# change), processed with the management command vola_process_events.
+# EVENT_HANDLERS are dotted paths of methods called with a list of events
+# (per container and group), failed events are retried EVENT_RETRIES times.
+EVENTS = getattr(settings, "VOLA_EVENTS", False)
+EVENT_HANDLERS = getattr(settings, "VOLA_EVENT_HANDLERS", ())
+EVENT_RETRIES = getattr(settings, "VOLA_EVENT_RETRIES", 3)
+
+# Expire the cached pages of a container (based on its page_url, for every
+# language) with editing plugins and transferring previews. With EVENTS,
+# pages are expired with vola_process_events instead of with the request.
+EXPIRE_VIEW_CACHE = getattr(settings, "VOLA_EXPIRE_VIEW_CACHE", False)
@@ -5,12 +5,100 @@ from django.dispatch import Signal
 
 # edit plugins
 vola_pre_edit_plugins = Signal(providing_args=["container", "group", "plugins"])
-vola_post_edit_plugins = Signal(providing_args=["container", "group", "plugins"])
+vola_post_edit_plugins = Signal(providing_args=["container", "group", "plugins", "changes"])
 
 # create preview signals
 vola_pre_create_preview = Signal(providing_args=["container"])
-vola_post_create_preview = Signal(providing_args=["container"])
+vola_post_create_preview = Signal(providing_args=["container", "changes"])
 
 # transfer preview signals
 vola_pre_transfer_preview = Signal(providing_args=["container"])
-vola_post_transfer_preview = Signal(providing_args=["container"])
+vola_post_transfer_preview = Signal(providing_args=["container", "changes"])
+
+
+class ChangeSet(object):
+    """
+    Changed plugins of a container, sent as ``changes`` with the post signals
+
+    ``added``, ``changed`` and ``deleted`` are lists of dictionaries with
+    the ``id``, ``model`` (app_label.model_name), ``group`` (slug) and
+    ``language`` (code) of a plugin. Changed plugins also have a list of
+    the changed ``fields``. Deleted plugins are given as they have been
+    before the change, so their ids may not exist anymore.
+
+    If computing the changes is expensive, a ``loader`` (called with the
+    change set) adds the changes when they are accessed for the first time.
+    """
+
+    def __init__(self, container=None, loader=None):
+        self.container = container
+        self.loader = loader
+        self._added = []
+        self._changed = []
+        self._deleted = []
+
+    def load(self):
+        loader, self.loader = self.loader, None
+        if loader is not None:
+            loader(self)
+
+    @property
+    def added(self):
+        self.load()
+        return self._added
+
+    @property
+    def changed(self):
+        self.load()
+        return self._changed
+
+    @property
+    def deleted(self):
+        self.load()
+        return self._deleted
+
+    def __len__(self):
+        return len(self.added) + len(self.changed) + len(self.deleted)
+
+    def __iter__(self):
+        return iter(self.added + self.changed + self.deleted)
+
+    def get_item(self, plugin, **kwargs):
+        item = {
+            "id": plugin.pk,
+            "model": "%s.%s" % (plugin.app_label, plugin.model_name),
+            "group": plugin.group_slug,
+            "language": plugin.language_code,
+        }
+        item.update(kwargs)
+        return item
+
+    def add(self, plugin):
+        self._added.append(self.get_item(plugin))
+
+    def change(self, plugin, fields):
+        self._changed.append(self.get_item(plugin, fields=sorted(fields)))
+
+    def delete(self, plugin):
+        self._deleted.append(self.get_item(plugin))
+
+    @property
+    def groups(self):
+        return sorted(set(item["group"] for item in self if item["group"]))
+
+    @property
+    def languages(self):
+        return sorted(set(item["language"] for item in self if item["language"]))
+
+    def as_dict(self):
+        """
+        The change set as a JSON serializable dictionary
+        """
+        return {
+            "container": self.container.pk if self.container else None,
+            "added": self.added,
+            "changed": self.changed,
+            "deleted": self.deleted,
+            "groups": self.groups,
+            "languages": self.languages,
+        }
@@ -13,31 +13,59 @@ from django.utils.http import urlquote
 register = Library()
 
 # PROJECT IMPORTS
-from vola.models import Language, Category, Container, Group, Plugin
+from vola.models import Language, Category, Container, Group, Plugin, Snapshot, downcast_plugins
+from vola.utils import get_group_cache_key, get_plugins_cache_key
+from vola import settings as vola_settings
 
 
 def get_cache_key(category, container_slug, group_slug, plugin_slug=None, **kwargs):
     """
     The vola hierarchical cache key is constructed around containers & groups.
     Invalidation works with a post-save signal (cache callback) by
-    incrementing the group-key (<container_slug>-<group_slug>).
+    incrementing the group-key (<container_cache_key>-<group_slug>).
     """
     # first, we try to retrieve the cache_group
-    cache_group_key = "%s-%s" % (container_slug, group_slug)
+    cache_group_key = get_group_cache_key(Container.objects.get_cache_key(container_slug), group_slug)
     cache_group = cache.get(cache_group_key)
     # if the group has not been generated or is invalid,
     # we create the cache_group
     if cache_group is None:
         cache_group = random.randint(0, 10000)
         cache.set(cache_group_key, cache_group)
-    # order the keyword arguments, because otherwise we will
-    # build multiple caching instances (which is pointless)
-    arguments = []
-    for k in sorted(kwargs):
-        arguments.append(kwargs.get(k, None))
-    arguments = ":".join(arguments)
     # finally, build the cache key
-    return "%s:%s:%s:%s" % (cache_group, category, plugin_slug, arguments)
+    return get_plugins_cache_key(cache_group, category, plugin_slug, **kwargs)
+
+
+def get_plugins(container_slug, group_slug, language=None):
+    """
+    Returns a list of plugins for a container, group and language.
+
+    With VOLA_SNAPSHOTS, plugins are read from the latest published
+    snapshot (one row) instead of the plugin tables. Previews are
+    never published, so we get the plugins in that case.
+    """
+    container_slug = Container.objects.get_cache_key(container_slug)
+    if vola_settings.SNAPSHOTS:
+        plugins = Snapshot.objects.get_plugins(container_slug, group_slug, language)
+        if plugins is not None:
+            return plugins
+    plugin_list = Plugin.objects.filter(container_slug=container_slug, group_slug=group_slug, language_code=language or "")
+    return downcast_plugins(plugin_list)
+
+
+def get_cached_plugins(container_slug, slug, group_slug, language=None):
+    """
+    Returns the plugins of a group, read from the cached plugin list
+    (e.g. filled with ContainerManager.warm_cache) if available.
+
+    ``slug`` differs from ``container_slug`` with previews (which are not cached).
+    """
+    if slug == container_slug:
+        kwargs = {"language": language} if language else {}
+        plugins = cache.get(get_cache_key("volapluginlist", container_slug, group_slug, **kwargs))
+        if plugins:
+            return plugins
+    return get_plugins(slug, group_slug, language)
 
 
 @register.assignment_tag(takes_context=True)
@@ -59,10 +87,7 @@ def vola_plugin_list(context, container_slug, group_slug, *args, **kwargs):
         result_list = []
         slug = context["request"].GET.get(container_slug, container_slug) # preview
         language = kwargs.get("language", None)
-        plugin_list = Plugin.objects.filter(group__slug=group_slug, container__slug=slug, language__name=language)
-
-        for item in plugin_list:
-            plugin = eval("item."+item.model_name)
+        for plugin in get_plugins(slug, group_slug, language):
             result_list.append(plugin)
 
         if cache_key:
@@ -93,10 +118,7 @@ def vola_rendered_plugin_list(context, container_slug, group_slug, *args, **kwar
         result_list = []
         slug = context["request"].GET.get(container_slug, container_slug) # preview
         language = kwargs.get("language", None)
-        plugin_list = Plugin.objects.filter(group__slug=group_slug, container__slug=slug, language__name=language)
-
-        for item in plugin_list:
-            plugin = eval("item."+item.model_name)
+        for plugin in get_cached_plugins(container_slug, slug, group_slug, language):
             result_list.append(plugin.render(context, *args, **kwargs))
 
         if cache_key:
@@ -127,10 +149,7 @@ def vola_data_plugin_list(context, container_slug, group_slug, *args, **kwargs):
         result_list = []
         slug = context["request"].GET.get(container_slug, container_slug) # preview
         language = kwargs.get("language", None)
-        plugin_list = Plugin.objects.filter(group__slug=group_slug, container__slug=slug, language__name=language)
-
-        for item in plugin_list:
-            plugin = eval("item."+item.model_name)
+        for plugin in get_cached_plugins(container_slug, slug, group_slug, language):
             result_list.append(plugin.data(context, *args, **kwargs))
 
         if cache_key:
@@ -157,10 +176,7 @@ def vola_plugin(context, container_slug, group_slug, plugin_slug, *args, **kwarg
     if not result:
         slug = context["request"].GET.get(container_slug, container_slug) # preview
         language = kwargs.get("language", None)
-        plugin_list = Plugin.objects.filter(group__slug=group_slug, container__slug=slug, language__name=language)
-
-        for item in plugin_list:
-            plugin = eval("item."+item.model_name)
+        for plugin in get_cached_plugins(container_slug, slug, group_slug, language):
             if plugin.slug == plugin_slug:
                 result = plugin
 
@@ -188,10 +204,7 @@ def vola_rendered_plugin(context, container_slug, group_slug, plugin_slug, *args
     if not result:
         slug = context["request"].GET.get(container_slug, container_slug) # preview
         language = kwargs.get("language", None)
-        plugin_list = Plugin.objects.filter(group__slug=group_slug, container__slug=slug, language__name=language)
-
-        for item in plugin_list:
-            plugin = eval("item."+item.model_name)
+        for plugin in get_cached_plugins(container_slug, slug, group_slug, language):
             if plugin.slug == plugin_slug:
                 result = plugin.render(context, *args, **kwargs)
 
@@ -222,10 +235,7 @@ def vola_data_plugin(context, container_slug, group_slug, plugin_slug, *args, **
     if not result:
         slug = context["request"].GET.get(container_slug, container_slug) # preview
         language = kwargs.get("language", None)
-        plugin_list = Plugin.objects.filter(group__slug=group_slug, container__slug=slug, language__name=language)
-
-        for item in plugin_list:
-            plugin = eval("item."+item.model_name)
+        for plugin in get_cached_plugins(container_slug, slug, group_slug, language):
             if plugin.slug == plugin_slug:
                 result = plugin.data(context, *args, **kwargs)
 
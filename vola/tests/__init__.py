@@ -1 +1 @@
-from vola.tests.test_vola import VolaBasicTests, VolaPermissionTests, VolaModelTests, VolaViewTests, VolaTemplatetagTests
+from vola.tests.test_vola import VolaBasicTests, VolaPermissionTests, VolaModelTests, VolaTransactionTests, VolaViewTests, VolaTemplatetagTests
@@ -3,12 +3,12 @@
 # DJANGO IMPORTS
 from django.db import models
 from django import template
+from django import forms
 from django.contrib.contenttypes.models import ContentType
 from django.db.models.signals import post_save
-from django.core.cache import cache
 
 # VOLA IMPORTS
-from vola.models import Plugin
+from vola.models import Plugin, ContentPlugin, ContentField, invalidate_group
 
 
 # CACHE CALLBACK
@@ -25,10 +25,7 @@ def cache_callback(sender, **kwargs):
 
     # BlogEntry: PluginLatestBlogEntries, PluginBlogEntry
     if instance and isinstance(instance, BlogEntry):
-        try:
-            cache.incr("home-main")
-        except:
-            pass
+        invalidate_group("home", "main")
 
 
 # EXAMPLE MODELS
@@ -279,4 +276,28 @@ class PluginGeneric(Plugin):
         return t.render(c)
 
 
+class PluginText(ContentPlugin):
+    """
+    Text (without a table of its own)
+
+    Fields are stored with the plugins content,
+    see ``ContentPlugin``.
+    """
+
+    title = ContentField(forms.CharField, max_length=200)
+    body = ContentField(forms.CharField, widget=forms.Textarea)
+    pub_date = ContentField(forms.DateField, required=False)
+
+    class Meta:
+        proxy = True
+        verbose_name = "Text"
+        verbose_name_plural = "Texts"
+
+    def __unicode__(self):
+        return self.title
 
+    def data(self, context=None, *args, **kwargs):
+        return {
+            "title": self.title,
+            "body": self.body
+        }
@@ -2,31 +2,62 @@
 
 # PYTHON IMPORTS
 import datetime
+import json
+from StringIO import StringIO
 
 # DJANGO IMPORTS
 from django.conf import settings
 from django.core.management import call_command
 from django.db.models import loading
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.test.client import Client, RequestFactory
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
-from django.contrib.auth.models import User, Permission as DjangoPermission
+from django.contrib import admin
+from django.contrib.admin.helpers import AdminForm
+from django.contrib.auth.models import User, Group as UserGroup, Permission as DjangoPermission
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import PermissionDenied
 from django import template
 from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import learn_cache_key
 
 # PROJECT IMPORTS
-from vola.models import Language, Category, Container, Group, Plugin, Permission
+from vola.models import Language, Category, Container, Group, Plugin, Permission, Snapshot, Revision, Event
+from vola.models import get_plugin_model, downcast_plugins, invalidate_group
+from vola.utils import get_group_cache_key, get_container_cache_key, get_plugins_cache_key, defer_cache_invalidation, deferred_transaction
 from vola.templatetags.vola_tags import vola_plugin_list, vola_rendered_plugin_list, vola_data_plugin_list, vola_plugin, vola_rendered_plugin, vola_data_plugin, vola_data, vola_render, vola_render_as_template
-from vola.templatetags.vola_tags import get_cache_key
+from vola.templatetags.vola_tags import get_cache_key, get_plugins
+from vola import settings as vola_settings
+from vola import signals
+from vola.signals import ChangeSet
+from vola.admin import ContainerAdmin, PluginAdmin, ContentPluginAdmin, ValidationContext, get_validation_method, _changelist
 
 # TEST IMPORTS
 from vola.tests.models import BlogEntry, CustomEntry
 from vola.tests.models import PluginSnippet, PluginLatestBlogEntries, PluginLatestCustomEntries, PluginBlogEntry, PluginCustomEntry, PluginGeneric
+from vola.tests.models import PluginText
 
 
-class VolalTestCase(TestCase):
+def validate_positions(request, group, containeradminform, pluginadminforms, context=None):
+    """
+    Group validation (used with test_group_validation), moving plugins is not allowed
+    """
+    for adminform in pluginadminforms:
+        original = context.get_original(adminform)
+        if original and original.position != adminform.form.instance.position:
+            adminform.form.errors["__all__"] = adminform.form.error_class([u"Moving plugin is not allowed."])
+
+
+class PluginSnippetAdmin(PluginAdmin):
+    """
+    Plugin admin with all fields of PluginSnippet (used with saving plugins)
+    """
+    fieldsets = ((None, {"fields": ("title", "body", "position")}),)
+
+
+class VolalTransactionTestCase(TransactionTestCase):
 
     def _pre_setup(self):
         """
@@ -48,10 +79,12 @@ class VolalTestCase(TestCase):
                 "LOCATION": "volatestcache"
             }
         }
+        # cached groups of former tests may collide with new (random) cache_groups
+        cache.clear()
         # FIXME: remove debug-toolbar from INSTALLED_APPS, because it
         # requires the standard cache library to be installed when rendering
         # templates (which is being done with the tests below)
-        super(VolalTestCase, self)._pre_setup()
+        super(VolalTransactionTestCase, self)._pre_setup()
 
     def _post_teardown(self):
         """
@@ -59,7 +92,27 @@ class VolalTestCase(TestCase):
         """
         settings.INSTALLED_APPS = self.saved_INSTALLED_APPS
         settings.CACHES = self.saved_CACHES
-        super(VolalTestCase, self)._post_teardown()
+        super(VolalTransactionTestCase, self)._post_teardown()
+
+    def get_container_admin(self, plugins, plugin_admin=PluginAdmin):
+        """
+        A ContainerAdmin (with a separate admin site) and plugin models
+        registered with plugin_admin
+        """
+        site = admin.AdminSite()
+        site.register(Container, ContainerAdmin)
+        for model in plugins:
+            site.register(model, plugin_admin)
+        return site._registry[Container]
+
+    def get_request(self, data=None, method="post", user=None):
+        """
+        A request of the superuser (or user), without CSRF checks
+        """
+        request = getattr(self.factory, method)("/", data or {})
+        request.user = user or self.user_superuser
+        request._dont_enforce_csrf_checks = True
+        return request
     
     def setUp(self):
         """
@@ -114,6 +167,10 @@ class VolalTestCase(TestCase):
                 pub_date=datetime.date.today())
 
 
+class VolalTestCase(VolalTransactionTestCase, TestCase):
+    pass
+
+
 class VolaBasicTests(VolalTestCase):
     
     def test_objects_created(self):
@@ -178,16 +235,16 @@ class VolaPermissionTests(VolalTestCase):
         self.assertRedirects(response, reverse("admin:vola_container_change", args=[4]), status_code=302, target_status_code=200)
         self.assertEqual(Container.objects.count(), 4)
         self.assertEqual(Group.objects.count(), 6) # two new groups with the preview
-        # transfer preview redirects to the new preview container
+        # transfer preview redirects to the container (which keeps its id)
         response = self.client.get(reverse("admin:vola_container_transfer_preview", args=[4]))
         self.assertRedirects(response, reverse("admin:vola_container_change", args=[1]), status_code=302, target_status_code=200)
-        self.assertEqual(Container.objects.count(), 3)
-        self.assertEqual(Group.objects.count(), 4)
-        # now we have groups with IDs 7 and 8
-        # create_preview generates 5 and 6, transfer then generates 7 and 8
-        response = self.client.get(reverse("admin:vola_container_group", args=[1,7]))
+        self.assertEqual(Container.objects.count(), 4) # the former content is kept as a revision
+        self.assertEqual(Group.objects.count(), 6)
+        self.assertEqual(Container.objects.get(slug="home").id, 1)
+        # create_preview generates groups 5 and 6, the container keeps groups 1 and 2
+        response = self.client.get(reverse("admin:vola_container_group", args=[1,1]))
         self.assertEqual(response.status_code, 200)
-        response = self.client.get(reverse("admin:vola_container_group", args=[1,8]))
+        response = self.client.get(reverse("admin:vola_container_group", args=[1,2]))
         self.assertEqual(response.status_code, 200)
         # logout
         self.client.logout()
@@ -419,6 +476,29 @@ class VolaPermissionTests(VolalTestCase):
         # logout
         self.client.logout()
 
+    def test_permissions_request(self):
+        """
+        Test permissions being computed once per request and container
+        """
+        content_type = ContentType.objects.get_for_model(Container)
+        self.user_editor.user_permissions.add(DjangoPermission.objects.get(content_type=content_type, codename="change_container"))
+        user_group = UserGroup.objects.create(name="editors")
+        self.user_editor.groups.add(user_group)
+        Permission.objects.create(container_id=1, user=self.user_editor, manage_preview=True)
+        Permission.objects.create(container_id=1, group=user_group, manage_plugins=True)
+        container_admin = admin.site._registry[Container]
+        request = self.factory.get("/")
+        request.user = User.objects.get(pk=self.user_editor.pk)
+        request.user.has_perm("vola.change_container")
+        with self.assertNumQueries(1):
+            self.assertFalse(container_admin.has_container_permission(request, self.container_page_home))
+            self.assertTrue(container_admin.has_preview_permission(request, self.container_page_home))
+            self.assertTrue(container_admin.has_plugins_permission(request, "1"))
+        self.assertFalse(container_admin.has_plugins_permission(request, self.container_page_blog))
+        # changing permissions
+        Permission.objects.filter(container_id=1, user=self.user_editor).get().delete()
+        self.assertFalse(container_admin.has_preview_permission(request, self.container_page_home))
+
 
 class VolaModelTests(VolalTestCase):
     
@@ -486,6 +566,617 @@ class VolaModelTests(VolalTestCase):
         # template_name
         self.assertEqual(p.template_name, "plugin")
 
+    def test_plugin_lookup_fields(self):
+        """
+        Test denormalized container_slug, group_slug and language_code
+        """
+        p = Plugin.objects.create(container=self.container_page_home, group=self.group_page_home_main, language=self.language_de, position=0)
+        self.assertEqual(p.container_slug, "home")
+        self.assertEqual(p.group_slug, "main")
+        self.assertEqual(p.language_code, "de")
+        # changing slugs updates plugins (the containers cache_key does not change)
+        self.container_page_home.slug = "start"
+        self.container_page_home.save()
+        self.group_page_home_main.slug = "content"
+        self.group_page_home_main.save()
+        p = Plugin.objects.get(pk=p.pk)
+        self.assertEqual(p.container_slug, "home")
+        self.assertEqual(p.group_slug, "content")
+        self.assertEqual(Container.objects.get_cache_key("start"), "home")
+        # plugin without group/language
+        p = Plugin.objects.create(container=self.container_snippets, position=0)
+        self.assertEqual(p.group_slug, "")
+        self.assertEqual(p.language_code, "")
+
+    def test_plugin_downcast(self):
+        """
+        Test plugin registry and downcasting plugins
+        """
+        self.assertEqual(get_plugin_model("vola", "plugin"), Plugin)
+        self.assertEqual(get_plugin_model("tests", "pluginsnippet"), PluginSnippet)
+        self.assertEqual(get_plugin_model("tests", "unknown"), None)
+        PluginSnippet.objects.create(container=self.container_snippets, group=self.group_snippets, position=0, title=u"snippet", body=u"xxx")
+        PluginBlogEntry.objects.create(container=self.container_snippets, group=self.group_snippets, position=1, blogentry_id=1)
+        p = Plugin.objects.get(position=0)
+        self.assertTrue(isinstance(p.downcast(), PluginSnippet))
+        self.assertEqual(p.get_plugin.title, u"snippet")
+        # downcast is cached with the instance
+        self.assertNumQueries(0, p.downcast)
+        # one query for fetching plugins, one query per plugin model
+        with self.assertNumQueries(3):
+            plugins = downcast_plugins(Plugin.objects.filter(container=self.container_snippets))
+        self.assertEqual([plugin.__class__ for plugin in plugins], [PluginSnippet, PluginBlogEntry])
+
+    def test_plugin_bulk_save(self):
+        """
+        Test bulk saving plugins with deferred cache invalidation
+        """
+        for i in range(0, 3):
+            PluginSnippet.objects.create(container=self.container_snippets, group=self.group_snippets, position=i, title=u"snippet %s" % i, body=u"xxx")
+        cache_group_key = get_group_cache_key("snippets", "plugins")
+        cache.set(cache_group_key, 1)
+        plugins = list(PluginSnippet.objects.all())
+        for plugin in plugins:
+            plugin.title = u"changed"
+        # lookup fields did not change, so there is no need to fetch container/group
+        self.assertFalse(plugins[0].lookup_fields_changed())
+        # cache is invalidated when leaving the context manager
+        with defer_cache_invalidation():
+            Plugin.objects.bulk_save(plugins)
+            self.assertEqual(cache.get(cache_group_key), 1)
+        self.assertEqual(cache.get(cache_group_key), None)
+        self.assertEqual(PluginSnippet.objects.filter(title=u"changed").count(), 3)
+        # bulk update
+        cache.set(cache_group_key, 1)
+        self.assertEqual(Plugin.objects.bulk_update(Plugin.objects.filter(container=self.container_snippets), lock_content=True), 3)
+        self.assertEqual(cache.get(cache_group_key), None)
+        self.assertEqual(Plugin.objects.filter(lock_content=True).count(), 3)
+        # moving a plugin to another group
+        plugin = PluginSnippet.objects.get(position=0)
+        plugin.container = self.container_page_home
+        plugin.group = self.group_page_home_main
+        plugin.save()
+        self.assertEqual(plugin.container_slug, "home")
+        self.assertEqual(plugin.group_slug, "main")
+
+    def test_reorder(self):
+        """
+        Test reordering languages, categories, groups and plugins
+        """
+        Language.objects.reorder([2, 1])
+        self.assertEqual(list(Language.objects.values_list("name", flat=True)), ["de", "en"])
+        Category.objects.reorder([2, 1])
+        self.assertEqual(list(Category.objects.values_list("id", flat=True)), [2, 1])
+        Group.objects.reorder([self.group_page_home_sidebar.id, self.group_page_home_main.id], container=self.container_page_home)
+        self.assertEqual(list(self.container_page_home.groups.values_list("slug", flat=True)), ["sidebar", "main"])
+        # plugins
+        ids = []
+        for i in range(0, 3):
+            p = PluginSnippet.objects.create(container=self.container_snippets, group=self.group_snippets, position=i, title=u"snippet %s" % i, body=u"xxx")
+            ids.append(p.id)
+        cache_group_key = get_group_cache_key("snippets", "plugins")
+        cache.set(cache_group_key, 1)
+        update_date = Plugin.objects.get(pk=ids[0]).update_date
+        with self.assertNumQueries(2):
+            Plugin.objects.reorder(list(reversed(ids)), group=self.group_snippets)
+        self.assertEqual(list(Plugin.objects.filter(group=self.group_snippets).values_list("id", flat=True)), list(reversed(ids)))
+        # update_date is set with the same query
+        self.assertTrue(Plugin.objects.get(pk=ids[0]).update_date > update_date)
+        self.assertEqual(cache.get(cache_group_key), None)
+        # plugins of other groups are not being updated
+        self.assertEqual(Plugin.objects.reorder(ids, group=self.group_page_home_main), 0)
+
+    def test_snapshot(self):
+        """
+        Test publishing and reading snapshots
+        """
+        PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="snippet", position=0, title=u"snippet", body=u"xxx")
+        PluginBlogEntry.objects.create(container=self.container_page_home, group=self.group_page_home_main, position=1, blogentry_id=1)
+        self.assertEqual(Snapshot.objects.get_plugins("home", "main"), None)
+        # publish all groups and languages (2 groups, 2 languages + no language)
+        self.assertEqual(len(Snapshot.objects.publish_container(self.container_page_home)), 6)
+        with self.assertNumQueries(1):
+            plugins = Snapshot.objects.get_plugins("home", "main")
+        self.assertEqual([plugin.__class__ for plugin in plugins], [PluginSnippet, PluginBlogEntry])
+        self.assertEqual(plugins[0].title, u"snippet")
+        self.assertEqual(plugins[1].blogentry.title, u"Blog Entry Nr. 1")
+        self.assertEqual(Snapshot.objects.get_plugins("home", "main", "de"), [])
+        # changing plugins does not change the published snapshot
+        PluginSnippet.objects.update(title=u"changed")
+        vola_settings.SNAPSHOTS = True
+        try:
+            self.assertEqual(get_plugins("home", "main")[0].title, u"snippet")
+            # publish a new version
+            snapshot = Snapshot.objects.publish(self.container_page_home, self.group_page_home_main)
+            self.assertEqual(snapshot.version, 2)
+            self.assertEqual(get_plugins("home", "main")[0].title, u"changed")
+            # former versions are deleted
+            self.assertEqual(list(Snapshot.objects.filter(container_slug="home", group_slug="main", language_code="").values_list("version", flat=True)), [2])
+            # reordering and deleting plugins with the admin publishes the group
+            container_admin = self.get_container_admin([PluginSnippet, PluginBlogEntry])
+            ids = list(reversed([plugin.pk for plugin in get_plugins("home", "main")]))
+            container_admin.reorder_view(self.get_request({"plugin": ids}), str(self.container_page_home.pk), str(self.group_page_home_main.pk))
+            self.assertEqual([plugin.pk for plugin in get_plugins("home", "main")], ids)
+            plugin_admin = container_admin.admin_site._registry[PluginBlogEntry]
+            plugin_admin.delete_model(self.get_request(), PluginBlogEntry.objects.get())
+            self.assertEqual([plugin.pk for plugin in get_plugins("home", "main")], ids[1:])
+        finally:
+            vola_settings.SNAPSHOTS = False
+
+    def test_content_plugin(self):
+        """
+        Test plugins storing their fields with the plugins content
+        """
+        p = PluginText.objects.create(container=self.container_snippets, group=self.group_snippets, position=0, title=u"text", body=u"xxx", pub_date=datetime.date(2014, 1, 1))
+        self.assertEqual(p.model_name, "plugintext")
+        self.assertEqual(Plugin.objects.count(), 1)
+        # typed fields
+        p = PluginText.objects.get(pk=p.pk)
+        self.assertEqual(p.title, u"text")
+        self.assertEqual(p.pub_date, datetime.date(2014, 1, 1))
+        # downcast without additional queries
+        p = Plugin.objects.get(pk=p.pk)
+        with self.assertNumQueries(0):
+            plugin = p.downcast()
+        self.assertTrue(isinstance(plugin, PluginText))
+        self.assertEqual(plugin.body, u"xxx")
+        # copy
+        plugin.pk = plugin.id = None
+        plugin.body = u"yyy"
+        plugin.save()
+        self.assertEqual(sorted(p.get_plugin.body for p in Plugin.objects.all()), [u"xxx", u"yyy"])
+        # snapshots
+        Snapshot.objects.publish(self.container_snippets, self.group_snippets)
+        self.assertEqual([p.title for p in Snapshot.objects.get_plugins("snippets", "plugins")], [u"text", u"text"])
+
+    def test_create_preview(self):
+        """
+        Test creating a preview with bulk inserts
+        """
+        Permission.objects.create(container=self.container_page_home, user=self.user_editor, manage_preview=True)
+        for i in range(0, 3):
+            PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, position=i, title=u"snippet %s" % i, body=u"xxx")
+            PluginBlogEntry.objects.create(container=self.container_page_home, group=self.group_page_home_sidebar, position=i, blogentry_id=i + 1)
+        PluginText.objects.create(container=self.container_page_home, group=self.group_page_home_main, position=3, title=u"text", body=u"xxx")
+        # the number of queries does not depend on the number of plugins
+        with self.assertNumQueries(15):
+            preview = self.container_page_home.create_preview()
+        self.assertEqual(preview.slug, "home_%s" % preview.id)
+        self.assertTrue(preview.preview)
+        self.assertEqual(Container.objects.get(pk=preview.pk).transfer_container, self.container_page_home)
+        self.assertEqual(preview.permissions.get().user, self.user_editor)
+        self.assertEqual(list(preview.groups.values_list("slug", flat=True)), ["main", "sidebar"])
+        plugins = downcast_plugins(preview.plugins.filter(group__slug="main"))
+        self.assertEqual([p.title for p in plugins], [u"snippet 0", u"snippet 1", u"snippet 2", u"text"])
+        self.assertEqual(plugins[3].body, u"xxx")
+        self.assertEqual(plugins[0].group_slug, "main")
+        self.assertEqual(plugins[0].container_slug, preview.slug)
+        plugins = downcast_plugins(preview.plugins.filter(group__slug="sidebar"))
+        self.assertEqual([p.blogentry_id for p in plugins], [1, 2, 3])
+        # uids are kept with the preview
+        self.assertEqual(set(preview.plugins.values_list("uid", flat=True)), set(self.container_page_home.plugins.values_list("uid", flat=True)))
+        self.assertEqual(PluginSnippet.objects.count(), 6)
+
+    def test_transfer_preview(self):
+        """
+        Test transferring a preview by switching the content of containers
+        """
+        PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="snippet", position=0, title=u"snippet", body=u"xxx")
+        user_group = UserGroup.objects.create(name="editors")
+        Permission.objects.create(container=self.container_page_home, user=self.user_editor, manage_preview=True)
+        Permission.objects.create(container=self.container_page_home, group=user_group, manage_plugins=True)
+        preview = self.container_page_home.create_preview()
+        PluginSnippet.objects.filter(container=preview).update(title=u"changed")
+        Group.objects.filter(container=preview, slug="sidebar").update(name=u"Changed")
+        self.assertEqual(get_plugins("home", "main")[0].title, u"snippet")
+        self.assertEqual(get_plugins(preview.slug, "main")[0].title, u"changed")
+        # permissions changed with the preview are applied, unless changed with the container
+        Permission.objects.filter(container=preview, user=self.user_editor).update(manage_plugins=True)
+        Permission.objects.filter(container=preview, group=user_group).update(manage_container=True)
+        Permission.objects.filter(container=self.container_page_home, group=user_group).update(update_date=datetime.datetime.now() + datetime.timedelta(minutes=1))
+        # the number of queries does not depend on the number of plugins
+        with self.assertNumQueries(18):
+            container = preview.transfer_preview()
+        self.assertEqual(container, self.container_page_home)
+        self.assertEqual((container.slug, container.name, container.preview), ("home", "Home", False))
+        self.assertEqual(Container.objects.get_cache_key("home"), preview.slug)
+        # the group cache is invalidated by the slug of the container
+        key = get_group_cache_key(preview.slug, "main")
+        cache.set(key, 1)
+        invalidate_group("home", "main")
+        self.assertEqual(cache.get(key), None)
+        revision = Container.objects.get(pk=preview.pk)
+        self.assertEqual((revision.preview, revision.revision, revision.transfer_container), (True, True, container))
+        self.assertEqual(get_plugins("home", "main")[0].title, u"changed")
+        self.assertEqual(get_plugins(revision.slug, "main")[0].title, u"snippet")
+        self.assertEqual(Group.objects.get(pk=self.group_page_home_sidebar.pk).name, u"Changed")
+        self.assertEqual(Group.objects.get(container=revision, slug="sidebar").name, u"Sidebar")
+        permissions = Permission.objects.filter(container=container)
+        self.assertEqual(permissions.get(user=self.user_editor).manage_plugins, True)
+        self.assertEqual(permissions.get(group=user_group).manage_container, False)
+        # transferring the revision (rollback)
+        revision.transfer_preview()
+        self.assertEqual(get_plugins("home", "main")[0].title, u"snippet")
+        self.assertEqual(Group.objects.get(pk=self.group_page_home_sidebar.pk).name, u"Sidebar")
+        # older revisions are deleted with the transfer (see VOLA_TRANSFER_REVISIONS)
+        preview = self.container_page_home.create_preview()
+        preview.transfer_preview()
+        self.assertEqual(list(Container.objects.filter(revision=True).values_list("pk", flat=True)), [preview.pk])
+        # delete revisions
+        call_command("vola_delete_revisions", keep=0, stdout=StringIO())
+        self.assertEqual(Container.objects.count(), 3)
+        self.assertEqual(PluginSnippet.objects.count(), 1)
+        # with VOLA_REVISIONS, the former content is not kept
+        vola_settings.REVISIONS = True
+        try:
+            self.container_page_home.create_preview().transfer()
+        finally:
+            vola_settings.REVISIONS = False
+        self.assertEqual(Container.objects.count(), 3)
+        self.assertEqual(PluginSnippet.objects.count(), 1)
+        self.assertEqual(Revision.objects.filter(container=self.container_page_home).count(), 1)
+
+    def test_merge_preview(self):
+        """
+        Test transferring a preview by applying its changes to the container
+        """
+        a = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="a", position=0, title=u"a", body=u"xxx")
+        b = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="b", position=1, title=u"b", body=u"xxx")
+        c = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_sidebar, slug="c", position=0, title=u"c", body=u"xxx")
+        preview = self.container_page_home.create_preview()
+        preview_main = Group.objects.get(container=preview, slug="main")
+        PluginSnippet.objects.filter(container=preview, uid=a.uid).update(title=u"changed")
+        PluginSnippet.objects.filter(container=preview, uid=b.uid).delete()
+        d = PluginSnippet.objects.create(container=preview, group=preview_main, slug="d", position=1, title=u"d", body=u"xxx")
+        Permission.objects.create(container=preview, user=self.user_editor, manage_plugins=True)
+        sidebar_key = get_group_cache_key("home", "sidebar")
+        cache.set(sidebar_key, 1)
+        groups = preview.merge_preview()
+        self.assertEqual(groups, [self.group_page_home_main])
+        # the container and unchanged plugins keep their ids
+        self.assertEqual(Container.objects.get(pk=self.container_page_home.pk).slug, "home")
+        self.assertEqual([(p.pk, p.title) for p in get_plugins("home", "main")], [(a.pk, u"changed"), (PluginSnippet.objects.get(container=self.container_page_home, uid=d.uid).pk, u"d")])
+        self.assertEqual(PluginSnippet.objects.get(pk=c.pk).title, u"c")
+        self.assertFalse(PluginSnippet.objects.filter(pk=b.pk).exists())
+        # the cache of unchanged groups is kept
+        self.assertEqual(cache.get(sidebar_key), 1)
+        # permissions of the preview are applied and the preview is deleted
+        self.assertTrue(Permission.objects.get(container=self.container_page_home, user=self.user_editor).manage_plugins)
+        self.assertFalse(Container.objects.filter(pk=preview.pk).exists())
+        self.assertFalse(Plugin.objects.filter(container=preview.pk).exists())
+        # transferring with VOLA_TRANSFER_DIFF
+        preview = self.container_page_home.create_preview()
+        vola_settings.TRANSFER_DIFF = True
+        try:
+            self.assertEqual(preview.transfer(), self.container_page_home)
+        finally:
+            vola_settings.TRANSFER_DIFF = False
+        self.assertEqual(list(Container.objects.filter(transfer_container=self.container_page_home)), [])
+
+    def test_change_set(self):
+        """
+        Test the changes sent with the transfer and edit signals
+        """
+        a = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="a", position=0, title=u"a", body=u"xxx")
+        b = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="b", position=1, title=u"b", body=u"xxx")
+        changes = ChangeSet()
+        preview = self.container_page_home.create_preview(changes=changes)
+        self.assertEqual(sorted(item["id"] for item in changes.added), sorted(Plugin.objects.filter(container=preview).values_list("id", flat=True)))
+        PluginSnippet.objects.filter(container=preview, uid=a.uid).update(title=u"changed", position=2)
+        PluginSnippet.objects.filter(container=preview, uid=b.uid).delete()
+        received = []
+        def receiver(sender, **kwargs):
+            received.append(kwargs["changes"])
+        signals.vola_post_transfer_preview.connect(receiver)
+        try:
+            container = Container.objects.transfer_previews([preview])[0]
+        finally:
+            signals.vola_post_transfer_preview.disconnect(receiver)
+        changes = received[0]
+        # the changes are loaded when accessed
+        self.assertTrue(changes.loader is not None)
+        self.assertEqual(changes.container, container)
+        self.assertEqual(changes.changed, [{"id": PluginSnippet.objects.get(container=container, uid=a.uid).pk, "model": "tests.pluginsnippet", "group": "main", "language": "", "fields": ["position", "title"]}])
+        self.assertEqual([item["id"] for item in changes.deleted], [b.pk])
+        self.assertEqual((changes.added, changes.groups, changes.languages), ([], ["main"], []))
+        # merging (changes of merge_preview) and switching with revisions (compared to the previous revision)
+        for name in ("TRANSFER_DIFF", "REVISIONS"):
+            preview = container.create_preview()
+            PluginSnippet.objects.filter(container=preview, uid=a.uid).update(title=name)
+            setattr(vola_settings, name, True)
+            try:
+                changes = ChangeSet()
+                container = preview.transfer(changes=changes)
+            finally:
+                setattr(vola_settings, name, False)
+            plugin = PluginSnippet.objects.get(container=container, uid=a.uid)
+            self.assertEqual(changes.as_dict()["changed"], [{"id": plugin.pk, "model": "tests.pluginsnippet", "group": "main", "language": "", "fields": ["title"]}])
+            self.assertEqual((changes.added, changes.deleted), ([], []))
+        # edit signal
+        container_admin = self.get_container_admin([PluginSnippet], PluginSnippetAdmin)
+        plugin = PluginSnippet.objects.get(container=container, uid=a.uid)
+        request = self.get_request({"prefix": "plugin_1", "plugin_1-title": u"a", "plugin_1-body": u"xxx", "plugin_1-position": "2"})
+        received = []
+        signals.vola_post_edit_plugins.connect(receiver)
+        try:
+            container_admin.plugin_view(request, str(container.pk), str(plugin.group_id), str(plugin.pk))
+        finally:
+            signals.vola_post_edit_plugins.disconnect(receiver)
+        self.assertEqual([(item["id"], item["fields"]) for item in received[0].changed], [(plugin.pk, ["title"])])
+        self.assertEqual(received[0].as_dict()["groups"], ["main"])
+
+    def test_revisions(self):
+        """
+        Test recording revisions (deltas and checkpoints) and rollback
+        """
+        a = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="a", position=0, title=u"a", body=u"xxx")
+        b = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="b", position=1, title=u"b", body=u"xxx")
+        c = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_sidebar, slug="c", position=0, title=u"c", body=u"xxx")
+        self.assertTrue(Revision.objects.record(self.container_page_home).checkpoint)
+        self.assertEqual(Revision.objects.record(self.container_page_home), None)
+        PluginSnippet.objects.filter(pk=a.pk).update(title=u"changed")
+        b.delete()
+        d = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="d", position=1, title=u"d", body=u"xxx")
+        revision = Revision.objects.record(self.container_page_home)
+        self.assertEqual((revision.version, revision.checkpoint), (2, False))
+        delta = json.loads(revision.data)
+        self.assertEqual(delta["changed"], {a.uid: {"title": u"changed"}})
+        self.assertEqual(delta["deleted"], [b.uid])
+        self.assertEqual(list(delta["inserted"]), [d.uid])
+        # checkpoints
+        vola_settings.REVISION_CHECKPOINT = 2
+        try:
+            PluginSnippet.objects.filter(pk=c.pk).update(title=u"changed")
+            self.assertTrue(Revision.objects.record(self.container_page_home).checkpoint)
+        finally:
+            vola_settings.REVISION_CHECKPOINT = 10
+        self.assertEqual(Revision.objects.get_state(self.container_page_home, 3), Revision.objects.get_content(self.container_page_home))
+        # rollback
+        cache.set(get_group_cache_key("home", "main"), 1)
+        groups = Revision.objects.rollback(self.container_page_home, 1)
+        self.assertEqual(groups, [self.group_page_home_main, self.group_page_home_sidebar])
+        self.assertEqual(cache.get(get_group_cache_key("home", "main")), None)
+        self.assertEqual([(p.pk, p.title) for p in get_plugins("home", "main")], [(a.pk, u"a"), (PluginSnippet.objects.get(uid=b.uid).pk, u"b")])
+        self.assertEqual(PluginSnippet.objects.get(pk=c.pk).title, u"c")
+        self.assertEqual(Revision.objects.get_state(self.container_page_home, 4), Revision.objects.get_state(self.container_page_home, 1))
+        # revisions are kept with renaming the container
+        Container.objects.filter(pk=self.container_page_home.pk).update(slug="home-renamed")
+        PluginSnippet.objects.filter(pk=a.pk).update(title=u"renamed")
+        self.assertEqual(Revision.objects.record(Container.objects.get(pk=self.container_page_home.pk)).version, 5)
+
+    def test_batch_previews(self):
+        """
+        Test creating and transferring previews for a category
+        """
+        PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="snippet", position=0, title=u"snippet", body=u"xxx")
+        out = StringIO()
+        call_command("vola_create_previews", category="Pages", chunk_size=1, stdout=out)
+        self.assertTrue("2/2 containers" in out.getvalue())
+        previews = list(Container.objects.filter(preview=True).order_by("transfer_container__id"))
+        self.assertEqual([preview.transfer_container_id for preview in previews], [1, 2])
+        PluginSnippet.objects.filter(container__in=previews).update(title=u"changed")
+        cache.set(get_container_cache_key("home"), "home")
+        call_command("vola_transfer_previews", "home", "blog", stdout=StringIO())
+        self.assertEqual(list(Container.objects.filter(pk__in=[preview.pk for preview in previews]).order_by("id").values_list("revision", flat=True)), [True, True])
+        self.assertEqual(list(Container.objects.filter(pk__in=[1, 2]).order_by("id").values_list("cache_key", flat=True)), [preview.cache_key for preview in previews])
+        self.assertEqual(cache.get(get_container_cache_key("home")), previews[0].cache_key)
+        self.assertEqual(get_plugins("home", "main")[0].title, u"changed")
+        # with multiple previews of a container, the newest preview is transferred
+        older = self.container_page_home.create_preview()
+        newer = self.container_page_home.create_preview()
+        PluginSnippet.objects.filter(container=newer).update(title=u"newer")
+        self.client.login(username="superuser", password="superuser")
+        self.client.post(reverse("admin:vola_container_changelist"), {"action": "transfer_previews", "_selected_action": [older.pk, newer.pk]})
+        self.assertEqual(get_plugins("home", "main")[0].title, u"newer")
+        self.assertEqual(Container.objects.get(pk=older.pk).revision, False)
+
+    def test_warm_cache(self):
+        """
+        Test switching to pre-filled cache_groups when transferring a preview
+        """
+        PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="snippet", position=0, title=u"snippet", body=u"xxx")
+        self.assertEqual(get_plugins("home", "main")[0].title, u"snippet")
+        old_group = cache.get(get_group_cache_key("home", "main"))
+        preview = self.container_page_home.create_preview()
+        PluginSnippet.objects.filter(container=preview).update(title=u"changed")
+        with defer_cache_invalidation():
+            container = preview.transfer()
+            # not switched before leaving defer_cache_invalidation
+            self.assertEqual(cache.get(get_group_cache_key("home", "main")), old_group)
+            self.assertEqual(cache.get(get_container_cache_key("home")), "home")
+        self.assertEqual(cache.get(get_container_cache_key("home")), container.cache_key)
+        cache_group = cache.get(get_group_cache_key(container.cache_key, "main"))
+        plugins = cache.get(get_plugins_cache_key(cache_group, "volapluginlist"))
+        self.assertEqual([plugin.title for plugin in plugins], [u"changed"])
+        self.assertEqual(cache.get(get_plugins_cache_key(cache_group, "volapluginlist", language="en")), [])
+        # templatetags read the cached plugins
+        request = self.factory.get("/")
+        t = template.Template("""{% load vola_tags %}{% vola_data_plugin_list "home" "main" as plugins %}{{ plugins|length }}""")
+        with self.assertNumQueries(0):
+            self.assertEqual(t.render(template.RequestContext(request, {})), u"1")
+
+    def test_publish_due(self):
+        """
+        Test transferring previews with a transfer_date which has passed
+        """
+        PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="snippet", position=0, title=u"snippet", body=u"xxx")
+        preview = self.container_page_home.create_preview()
+        PluginSnippet.objects.filter(container=preview).update(title=u"changed")
+        later = self.container_page_home.create_preview()
+        Container.objects.filter(pk=preview.pk).update(transfer_date=datetime.datetime.now() - datetime.timedelta(minutes=1))
+        Container.objects.filter(pk=later.pk).update(transfer_date=datetime.datetime.now() + datetime.timedelta(days=1))
+        self.assertEqual(list(Container.objects.get_due_previews()), [preview])
+        call_command("vola_publish_due", stdout=StringIO())
+        container = Container.objects.get(pk=self.container_page_home.pk)
+        self.assertEqual((container.cache_key, Container.objects.get(pk=preview.pk).revision), (preview.cache_key, True))
+        # the cache is filled with the new container
+        with self.assertNumQueries(0):
+            self.assertEqual(Container.objects.get_cache_key("home"), container.cache_key)
+            self.assertTrue(cache.get(get_group_cache_key(container.cache_key, "main")) is not None)
+        self.assertEqual(get_plugins("home", "main")[0].title, u"changed")
+        # neither the revision nor the later preview are due
+        self.assertEqual(list(Container.objects.get_due_previews()), [])
+        self.assertEqual(Container.objects.get(pk=later.pk).transfer_container, container)
+
+    def test_events(self):
+        """
+        Test recording events with the post signals and processing them
+        """
+        PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="snippet", position=0, title=u"snippet", body=u"xxx")
+        vola_settings.EVENTS = True
+        try:
+            preview = Container.objects.create_previews([self.container_page_home])[0]
+            PluginSnippet.objects.filter(container=preview).update(title=u"changed")
+            Container.objects.transfer_previews([preview])
+            Event.objects.record("edit", self.container_page_home, self.group_page_home_main)
+            Event.objects.record("edit", self.container_page_home, self.group_page_home_main)
+        finally:
+            vola_settings.EVENTS = False
+        self.assertEqual([event.name for event in Event.objects.get_pending()], ["create_preview", "transfer", "edit", "edit"])
+        self.assertEqual(Event.objects.get(name="transfer").get_data()["changed"][0]["fields"], ["title"])
+        # events of a container and group are handled together, failed events are retried
+        handled, calls = [], []
+        def handler(events):
+            calls.append(events)
+            if len(calls) == 2:
+                raise ValueError
+            handled.append([event.name for event in events])
+        events = list(Event.objects.get_pending())
+        self.assertEqual(Event.objects.process(events, [handler]), 3)
+        self.assertEqual(handled, [["create_preview"], ["edit", "edit"]])
+        self.assertEqual(Event.objects.process(list(Event.objects.get_pending()), [handler]), 1)
+        self.assertEqual(handled[-1], ["transfer"])
+        self.assertEqual(Event.objects.get(name="transfer").attempts, 2)
+        self.assertFalse(Event.objects.get_pending().exists())
+
+    def test_page_url(self):
+        """
+        Test page urls with reversing (literal arguments only, see get_container_url)
+        """
+        container = self.container_page_home
+        container.page_url = "/self.language/self.slug/"
+        self.assertEqual(container.get_page_url("en"), "/en/home/")
+        container.page_url = "reverse('admin:vola_container_change', args=[1])"
+        self.assertEqual(container.get_page_url(), reverse("admin:vola_container_change", args=[1]))
+        container.page_url = "reverse('admin:vola_container_change', args=['self.language'])"
+        self.assertEqual(container.get_page_url("1"), reverse("admin:vola_container_change", args=[1]))
+        # no expressions, no other keywords
+        container.page_url = "reverse('admin:vola_container_change', args=[__import__('os').getpid()])"
+        self.assertEqual(container.get_page_url(), "")
+        container.page_url = "reverse('admin:vola_container_change', args=[1], urlconf='vola.urls')"
+        self.assertEqual(container.get_page_url(), "")
+
+    def test_expire_view_cache(self):
+        """
+        Test expiring the cached pages of a container with transferring a preview
+        """
+        Container.objects.filter(pk=self.container_page_home.pk).update(page_url="/self.language/self.slug/")
+        container = Container.objects.get(pk=self.container_page_home.pk)
+        self.assertEqual(container.get_page_urls(), [("/en/home/", "en"), ("/de/home/", "de")])
+        def cache_pages():
+            keys = []
+            for url, language in container.get_page_urls():
+                request = self.factory.get(url)
+                request.LANGUAGE_CODE = language
+                key = learn_cache_key(request, HttpResponse("page"))
+                cache.set(key, "page")
+                keys.append(key)
+            return keys
+        keys = cache_pages()
+        self.assertEqual(len(cache.get_many(keys)), 2)
+        vola_settings.EXPIRE_VIEW_CACHE = True
+        try:
+            Container.objects.transfer_previews([container.create_preview()])
+            self.assertEqual(cache.get_many(keys), {})
+            # with events, pages are expired when processing the events
+            keys = cache_pages()
+            vola_settings.EVENTS = True
+            try:
+                Container.objects.transfer_previews([container.create_preview()])
+                self.assertEqual(len(cache.get_many(keys)), 2)
+                call_command("vola_process_events", stdout=StringIO())
+                self.assertEqual(cache.get_many(keys), {})
+            finally:
+                vola_settings.EVENTS = False
+        finally:
+            vola_settings.EXPIRE_VIEW_CACHE = False
+
+class VolaTransactionTests(VolalTransactionTestCase):
+
+    def test_nested_transaction(self):
+        """
+        Test that nested transactions do not commit the outer transaction
+        and that caches are invalidated after the rollback
+        """
+        plugin = PluginSnippet.objects.create(container=self.container_page_home, group=self.group_page_home_main, slug="snippet", position=0, title=u"snippet", body=u"xxx")
+        key = get_group_cache_key("home", "main")
+        cache.set(key, 1)
+        try:
+            with deferred_transaction():
+                plugin.title = u"changed"
+                Plugin.objects.bulk_save([plugin])
+                self.assertEqual(cache.get(key), 1)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(PluginSnippet.objects.get(pk=plugin.pk).title, u"snippet")
+        self.assertEqual(cache.get(key), None)
+
+    def test_change_view_deferred(self):
+        """
+        Test that renaming a group with the container change view invalidates
+        the caches after the commit (see ContainerAdmin.save_formset)
+        """
+        self.client.login(username="superuser", password="superuser")
+        groups = [self.group_page_home_main, self.group_page_home_sidebar]
+        data = {
+            "name": u"Home", "slug": "home", "category": self.category_pages.pk,
+            "permissions-TOTAL_FORMS": "0", "permissions-INITIAL_FORMS": "0", "permissions-MAX_NUM_FORMS": "",
+            "groups-TOTAL_FORMS": "2", "groups-INITIAL_FORMS": "2", "groups-MAX_NUM_FORMS": "",
+        }
+        for i, group in enumerate(groups):
+            data.update({
+                "groups-%s-id" % i: group.pk, "groups-%s-container" % i: self.container_page_home.pk,
+                "groups-%s-name" % i: group.name, "groups-%s-slug" % i: group.slug,
+                "groups-%s-menu" % i: "on", "groups-%s-position" % i: group.position,
+            })
+        data["groups-0-slug"] = "renamed"
+        key = get_group_cache_key("home", "main")
+        cache.set(key, 1)
+        received = []
+        def receiver(sender, **kwargs):
+            received.append(cache.get(key))
+        signals.vola_post_edit_plugins.connect(receiver)
+        try:
+            response = self.client.post(reverse("admin:vola_container_change", args=[self.container_page_home.pk]), data)
+        finally:
+            signals.vola_post_edit_plugins.disconnect(receiver)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Group.objects.get(pk=self.group_page_home_main.pk).slug, "renamed")
+        # the cache is invalidated after the commit
+        self.assertEqual(received, [1])
+        self.assertEqual(cache.get(key), None)
+
+    def test_events_rollback(self):
+        """
+        Test that events are recorded within the transaction of the change
+        """
+        plugin = PluginSnippet.objects.create(container=self.container_snippets, group=self.group_snippets, position=0, title=u"snippet", body=u"xxx")
+        container_admin = self.get_container_admin([PluginSnippet], PluginSnippetAdmin)
+        request = self.get_request({"prefix": "plugin_1", "plugin_1-title": u"changed", "plugin_1-body": u"xxx", "plugin_1-position": "0"})
+        def receiver(sender, **kwargs):
+            self.assertEqual(Event.objects.count(), 1)
+            raise ValueError
+        vola_settings.EVENTS = True
+        signals.vola_post_edit_plugins.connect(receiver)
+        try:
+            self.assertRaises(ValueError, container_admin.plugin_view, request, str(self.container_snippets.pk), str(self.group_snippets.pk), str(plugin.pk))
+        finally:
+            signals.vola_post_edit_plugins.disconnect(receiver)
+            vola_settings.EVENTS = False
+        self.assertEqual(PluginSnippet.objects.get(pk=plugin.pk).title, u"snippet")
+        self.assertFalse(Event.objects.exists())
+
 
 class VolaViewTests(VolalTestCase):
     
@@ -497,6 +1188,16 @@ class VolaViewTests(VolalTestCase):
         response = self.client.get(reverse("admin:vola_container_changelist"))
         self.assertEqual(response.status_code, 200)
         # FIXME: check object_list count and columns
+        link = reverse("admin:vola_container_group", args=[1, self.group_page_home_main.id])
+        self.assertContains(response, "%s?lang=de" % link)
+        # the number of queries does not depend on the number of containers
+        for i in range(0, 5):
+            c = Container.objects.create(name="Test %s" % i, slug="test-%s" % i, category=self.category_pages)
+            Group.objects.create(container=c, name="Main", slug="main", position=1)
+        with self.assertNumQueries(7):
+            self.client.get(reverse("admin:vola_container_changelist"))
+        # languages are reset after rendering the changelist
+        self.assertEqual(_changelist.languages, None)
 
     def test_container_add(self):
         """
@@ -555,6 +1256,170 @@ class VolaViewTests(VolalTestCase):
         """
         pass
 
+    def test_available_plugins(self):
+        """
+        Test available plugins with plugins_include/plugins_exclude
+        """
+        site = admin.AdminSite()
+        site.register(Container, ContainerAdmin)
+        site.register(PluginSnippet, PluginAdmin)
+        site.register(PluginBlogEntry, PluginAdmin)
+        site.register(PluginText, ContentPluginAdmin)
+        site.register(BlogEntry)
+        container_admin = site._registry[Container]
+        group = self.group_page_home_main
+        names = lambda: [plugin["model_name"] for plugin in container_admin.get_available_plugins(group)]
+        self.assertEqual(names(), ["pluginblogentry", "pluginsnippet", "plugintext"])
+        group.plugins_include = "tests.pluginsnippet\ntests.plugintext"
+        group.plugins_exclude = "tests.plugintext"
+        group.save()
+        self.assertEqual(names(), ["pluginsnippet"])
+        # parsed filters are cached with the instance (until saved)
+        self.assertTrue(group.get_plugin_filters() is group.get_plugin_filters())
+        group.plugins_include = ""
+        group.plugins_exclude = "tests.*"
+        group.save()
+        self.assertEqual(names(), [])
+        # the catalog is rebuilt when registering plugins
+        site.register(PluginCustomEntry, PluginAdmin)
+        group.plugins_exclude = ""
+        group.save()
+        self.assertEqual(len(names()), 4)
+
+    def test_plugin_form_cache(self):
+        """
+        Test caching plugin form classes
+        """
+        site = admin.AdminSite()
+        plugin_admin = PluginAdmin(PluginSnippet, site)
+        content_plugin_admin = ContentPluginAdmin(PluginText, site)
+        request = self.factory.get("/")
+        request.user = self.user_superuser
+        form = plugin_admin.get_form(request)
+        self.assertTrue(plugin_admin.get_form(request) is form)
+        self.assertTrue(content_plugin_admin.get_form(request) is content_plugin_admin.get_form(request))
+        self.assertTrue("title" in content_plugin_admin.get_form(request).base_fields)
+        # different permissions, different form
+        request.user = self.user_editor
+        self.assertFalse(plugin_admin.get_form(request) is form)
+        self.assertTrue(plugin_admin.get_form(request) is plugin_admin.get_form(request))
+        # no caching with additional arguments
+        self.assertFalse(plugin_admin.get_form(request, exclude=["body"]) is plugin_admin.get_form(request, exclude=["body"]))
+        # no caching with formfields depending on the request
+        class PluginSnippetUserAdmin(PluginAdmin):
+            def formfield_for_dbfield(self, db_field, **kwargs):
+                return super(PluginSnippetUserAdmin, self).formfield_for_dbfield(db_field, **kwargs)
+        plugin_admin = PluginSnippetUserAdmin(PluginSnippet, site)
+        self.assertFalse(plugin_admin.get_form(request) is plugin_admin.get_form(request))
+        self.assertTrue(content_plugin_admin.get_form(request) is content_plugin_admin.get_form(request))
+
+    def test_plugin_summaries(self):
+        """
+        Test saving plugins which have not been loaded with the group view
+        """
+        container_admin = admin.site._registry[Container]
+        plugins = [PluginSnippet.objects.create(container=self.container_snippets, group=self.group_snippets, position=i, title=u"snippet %s" % i, body=u"xxx") for i in range(0, 3)]
+        summaries = [
+            {"original": plugins[0], "position": "2", "delete": 0},
+            {"original": plugins[1], "position": "1", "delete": "1"},
+            {"original": plugins[2], "position": "0", "delete": 0},
+        ]
+        request = self.factory.post("/")
+        container_admin.save_plugin_summaries(request, summaries, self.container_snippets, self.group_snippets)
+        self.assertEqual(list(PluginSnippet.objects.values_list("title", flat=True)), [u"snippet 2", u"snippet 0"])
+
+    def test_plugin_save(self):
+        """
+        Test saving a single plugin and skipping unchanged plugins
+        """
+        container_admin = self.get_container_admin([PluginSnippet], PluginSnippetAdmin)
+        plugins = [PluginSnippet.objects.create(container=self.container_snippets, group=self.group_snippets, position=i, title=u"snippet %s" % i, body=u"xxx") for i in range(0, 2)]
+        data = {"prefix": "plugin_1", "plugin_1-title": u"changed", "plugin_1-body": u"xxx", "plugin_1-position": "0"}
+        response = container_admin.plugin_view(self.get_request(data), str(self.container_snippets.pk), str(self.group_snippets.pk), str(plugins[0].pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["status"], "ok")
+        self.assertEqual(PluginSnippet.objects.get(pk=plugins[0].pk).title, u"changed")
+        # invalid data
+        data["plugin_1-title"] = u""
+        request = self.get_request(data)
+        response = container_admin.plugin_view(request, str(self.container_snippets.pk), str(self.group_snippets.pk), str(plugins[0].pk))
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue("plugin_1-title" in json.loads(response.content)["errors"])
+        # unchanged forms are not saved
+        pluginModel, pluginModelAdmin, pluginModelForm = container_admin.get_plugin_objects(request, "tests", "pluginsnippet")
+        plugin = PluginSnippet.objects.get(pk=plugins[1].pk)
+        data = {"plugin_2-title": plugin.title, "plugin_2-body": plugin.body, "plugin_2-position": "1"}
+        request = self.factory.post("/", data)
+        form = pluginModelForm(request.POST, prefix="plugin_2", instance=plugin)
+        self.assertTrue(form.is_valid())
+        with self.assertNumQueries(0):
+            container_admin.save_plugins(request, [form], None)
+
+    def test_group_validation(self):
+        """
+        Test group validation with the original plugins of a validation context
+        """
+        container_admin = self.get_container_admin([PluginSnippet])
+        self.group_snippets.validation = "vola.tests.test_vola.validate_positions"
+        self.group_snippets.save()
+        request = self.get_request({"plugin_0-position": "0", "plugin_1-position": "5"})
+        adminForm = AdminForm(container_admin.get_form(request, self.container_snippets)(instance=self.container_snippets), [], {})
+        pluginadminforms = []
+        for i in range(0, 2):
+            plugin = PluginSnippet.objects.create(container=self.container_snippets, group=self.group_snippets, position=i, title=u"snippet", body=u"xxx")
+            pluginModel, pluginModelAdmin, pluginModelForm = container_admin.get_plugin_objects(request, "tests", "pluginsnippet")
+            form = pluginModelForm(request.POST, prefix="plugin_%s" % i, instance=plugin)
+            pluginadminforms.append(container_admin.get_plugin_admin_form(request, "plugin_%s" % i, pluginModel, pluginModelAdmin, form, obj=plugin))
+            self.assertTrue(form.is_valid())
+        with self.assertNumQueries(0):
+            self.assertFalse(container_admin.group_valid(request, self.group_snippets, adminForm, pluginadminforms))
+        self.assertFalse(pluginadminforms[0].form.errors)
+        self.assertTrue(pluginadminforms[1].form.errors)
+        # validation methods are imported once
+        self.assertEqual(get_validation_method("vola.tests.test_vola.validate_positions"), (validate_positions, True))
+        # the original of a content plugin does not share the content with the instance
+        container_admin = self.get_container_admin([PluginText], ContentPluginAdmin)
+        plugin = PluginText.objects.create(container=self.container_snippets, group=self.group_snippets, position=2, title=u"text", body=u"xxx")
+        request = self.get_request({"plugin_2-title": u"changed", "plugin_2-body": u"xxx", "plugin_2-position": "2"})
+        pluginModel, pluginModelAdmin, pluginModelForm = container_admin.get_plugin_objects(request, "tests", "plugintext")
+        form = pluginModelForm(request.POST, prefix="plugin_2", instance=plugin)
+        adminform = container_admin.get_plugin_admin_form(request, "plugin_2", pluginModel, pluginModelAdmin, form, obj=plugin)
+        self.assertTrue(form.is_valid())
+        context = ValidationContext(request, self.group_snippets, adminForm, [adminform])
+        self.assertEqual((context.get_original(adminform).title, form.instance.title), (u"text", u"changed"))
+
+    def test_add_plugins(self):
+        """
+        Test forms for multiple new plugins with one request
+        """
+        container_admin = self.get_container_admin([PluginSnippet, PluginBlogEntry])
+        request = self.get_request({"c": 3, "p": ["tests.pluginsnippet", "tests.pluginblogentry", "tests.pluginsnippet"]}, method="get")
+        response = container_admin.add_plugins_view(request, str(self.container_snippets.pk), str(self.group_snippets.pk))
+        self.assertEqual([af.prefix for af in response.context_data["pluginadminforms"]], ["plugin_3", "plugin_4", "plugin_5"])
+        self.assertEqual([af.model_name for af in response.context_data["pluginadminforms"]], ["pluginsnippet", "pluginblogentry", "pluginsnippet"])
+        response.render()
+        self.assertContains(response, 'name="plugin_5-app_label" value="tests"')
+        # plugins not allowed with the group
+        self.group_snippets.plugins_exclude = "tests.pluginblogentry"
+        self.group_snippets.save()
+        request = self.get_request({"p": ["tests.pluginblogentry"]}, method="get")
+        self.assertRaises(PermissionDenied, container_admin.add_plugins_view, request, str(self.container_snippets.pk), str(self.group_snippets.pk))
+
+    def test_plugin_media(self):
+        """
+        Test merging media of plugin admins and forms
+        """
+        container_admin = self.get_container_admin([PluginSnippet])
+        request = self.get_request(method="get")
+        pluginadminforms = []
+        for i in range(0, 3):
+            plugin = PluginSnippet.objects.create(container=self.container_snippets, group=self.group_snippets, position=i, title=u"snippet", body=u"xxx")
+            pluginModel, pluginModelAdmin, pluginModelForm = container_admin.get_plugin_objects(request, "tests", "pluginsnippet")
+            pluginadminforms.append(container_admin.get_plugin_admin_form(request, "plugin_%s" % i, pluginModel, pluginModelAdmin, pluginModelForm(instance=plugin), obj=plugin))
+        media = container_admin.get_plugin_media(pluginadminforms)
+        self.assertEqual(media._js, (container_admin.media + pluginadminforms[0].adminmedia + pluginadminforms[0].media)._js)
+        self.assertEqual(len(media._js), len(set(media._js)))
+
     
 class VolaTemplatetagTests(VolalTestCase):
 
@@ -1,5 +1,238 @@
 # coding: utf-8
 
+# PYTHON IMPORTS
+import threading
+from contextlib import contextmanager
+from functools import wraps
+try:
+    from urllib.parse import urlsplit
+except ImportError: # python 2
+    from urlparse import urlsplit
+
+# DJANGO IMPORTS
+from django.conf import settings
+from django.core.cache import cache, get_cache, DEFAULT_CACHE_ALIAS
+from django.db import transaction, connections, router
+from django.http import HttpRequest
+from django.utils import timezone
+from django.utils.cache import get_cache_key
+
+# deferred cache invalidation (see defer_cache_invalidation)
+_deferred = threading.local()
+
+
+def import_from(method):
+    v = method.split(".")
+    name = v.pop()
+    module = ".".join(v)
+    module = __import__(module, fromlist=[name])
+    return getattr(module, name)
+
+
+def get_group_cache_key(container_slug, group_slug):
+    """
+    The cache_group key for a given container and group (see get_cache_key
+    with vola_tags), holding the current version of a cached group.
+    """
+    return "%s-%s" % (container_slug, group_slug)
+
+
+def invalidate_group_cache(container_slug, group_slug):
+    """
+    Invalidate all cached items for a given container and group.
+
+    With defer_cache_invalidation, the cache is invalidated when
+    leaving the context manager.
+    """
+    if not container_slug or not group_slug:
+        return
+    key = get_group_cache_key(container_slug, group_slug)
+    keys = getattr(_deferred, "keys", None)
+    if keys is not None:
+        keys.add(key)
+    else:
+        cache.delete(key)
+
+
+def get_container_cache_key(slug):
+    """
+    The key holding the cache_key of a container with a given slug
+    (see ContainerManager.get_cache_key).
+    """
+    return "vola:container:%s" % slug
+
+
+def invalidate_container_cache(*slugs):
+    """
+    Invalidate the cached cache_key of containers with the given slugs.
+
+    With defer_cache_invalidation, the cache is invalidated when
+    leaving the context manager.
+    """
+    keys = [get_container_cache_key(slug) for slug in slugs if slug]
+    deferred = getattr(_deferred, "keys", None)
+    if deferred is not None:
+        deferred.update(keys)
+    elif keys:
+        cache.delete_many(keys)
+
+
+def get_plugins_cache_key(cache_group, category, plugin_slug=None, **kwargs):
+    """
+    Cache key for the result of a templatetag (see get_cache_key with vola_tags)
+    with a given cache_group (the current value of the groups cache key).
+    """
+    # order the keyword arguments, because otherwise we will
+    # build multiple caching instances (which is pointless)
+    arguments = []
+    for k in sorted(kwargs):
+        arguments.append(kwargs.get(k, None))
+    arguments = ":".join(arguments)
+    return "%s:%s:%s:%s" % (cache_group, category, plugin_slug, arguments)
+
+
+def defer_cache_set(key, value):
+    """
+    Set a cache key, e.g. in order to switch a group to a new (pre-filled)
+    cache_group.
+
+    With defer_cache_invalidation, the key is set when leaving the context
+    manager (after deleting invalidated keys, instead of deleting the key).
+    """
+    values = getattr(_deferred, "values", None)
+    if values is not None:
+        values[key] = value
+    else:
+        cache.set(key, value)
+
+
+@contextmanager
+def commit_on_success_unless_managed(using=None):
+    """
+    Run a block with commit_on_success, unless a transaction is managed
+    already (e.g. with a view or an outer transaction). With Django 1.4/1.5,
+    nested calls of commit_on_success commit the outer transaction.
+    """
+    if transaction.is_managed(using=using):
+        yield
+    else:
+        with transaction.commit_on_success(using=using):
+            yield
+
+
+@contextmanager
+def defer_cache_invalidation():
+    """
+    Collect group (and container) cache invalidations and delete the keys
+    (once per group) when leaving the outermost context manager.
+
+    with defer_cache_invalidation():
+        with transaction.commit_on_success():
+            for plugin in plugins:
+                plugin.save()
+
+    The context manager does not start a transaction, so it has to be used
+    outside of the transaction in order to delete the keys after the commit
+    (see deferred_transaction). Nested calls are being collected with the
+    outer context manager. Keys given with defer_cache_set are set afterwards
+    (and not deleted). With errors, all keys are deleted.
+    """
+    outer = getattr(_deferred, "keys", None) is None
+    if outer:
+        _deferred.keys = set()
+        _deferred.values = {}
+    try:
+        yield
+    except:
+        if outer:
+            keys = _deferred.keys.union(_deferred.values)
+            _deferred.keys = _deferred.values = None
+            if keys:
+                cache.delete_many(list(keys))
+        raise
+    if outer:
+        keys, values = _deferred.keys.difference(_deferred.values), _deferred.values
+        _deferred.keys = _deferred.values = None
+        if keys:
+            cache.delete_many(list(keys))
+        if values:
+            cache.set_many(values)
+
+
+@contextmanager
+def deferred_transaction(using=None):
+    """
+    A transaction (see commit_on_success_unless_managed) with cache
+    invalidations being deferred until the transaction has been committed
+    (or rolled back). Within a managed transaction (e.g. a view decorated
+    with commit_on_success_deferred), the outer transaction is used.
+    """
+    with defer_cache_invalidation():
+        with commit_on_success_unless_managed(using=using):
+            yield
+
+
+def commit_on_success_deferred(func):
+    """
+    Decorator running a view with deferred_transaction
+    """
+    @wraps(func)
+    def inner(*args, **kwargs):
+        with deferred_transaction():
+            return func(*args, **kwargs)
+    return inner
+
+
+def update_positions(model, positions, field_name="position", **filters):
+    """
+    Update positions of a model with a single query.
+
+    positions: a dictionary {pk: position}
+    filters: additional conditions (field name and value),
+             e.g. update_positions(Plugin, {1: 0, 2: 1}, group=1)
+
+    UPDATE table SET position = CASE id WHEN 1 THEN 0 WHEN 2 THEN 1 END,
+    update_date = now WHERE id IN (1, 2) AND group_id = 1
+
+    Fields with auto_now (e.g. update_date) are set with the same query.
+    """
+    if not positions:
+        return 0
+    using = router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    opts = model._meta
+    pk_column = qn(opts.pk.column)
+    cases = []
+    params = []
+    for pk, position in positions.items():
+        cases.append("WHEN %s THEN %s")
+        params.extend([pk, position])
+    now = timezone.now()
+    updates = []
+    for field in opts.local_fields:
+        if getattr(field, "auto_now", False):
+            updates.append(", %s = %%s" % qn(field.column))
+            params.append(field.get_db_prep_value(now, connection))
+    params.extend(positions.keys())
+    sql = "UPDATE %s SET %s = CASE %s %s END%s WHERE %s IN (%s)" % (
+        qn(opts.db_table),
+        qn(opts.get_field(field_name).column),
+        pk_column,
+        " ".join(cases),
+        "".join(updates),
+        pk_column,
+        ", ".join(["%s"] * len(positions)),
+    )
+    for name, value in filters.items():
+        sql += " AND %s = %%s" % qn(opts.get_field(name).column)
+        params.append(getattr(value, "pk", value))
+    cursor = connection.cursor()
+    cursor.execute(sql, params)
+    transaction.commit_unless_managed(using=using)
+    return cursor.rowcount
+
+
 def expire_view_cache(view_name, args=[], namespace=None, key_prefix=None, method="GET"):
 
     """
@@ -15,23 +248,48 @@ def expire_view_cache(view_name, args=[], namespace=None, key_prefix=None, metho
     """
 
     from django.core.urlresolvers import reverse
-    from django.http import HttpRequest
-    from django.utils.cache import get_cache_key
-    from django.core.cache import cache
-    from django.conf import settings
-    # create a fake request object
-    request = HttpRequest()
-    request.method = method
-    if settings.USE_I18N:
-        request.LANGUAGE_CODE = settings.LANGUAGE_CODE
     # Loookup the request path:
     if namespace:
         view_name = namespace + ":" + view_name
-    request.path = reverse(view_name, args=args)
-    # get cache key, expire if the cached item exists:
-    key = get_cache_key(request, key_prefix=key_prefix)
-    if key:
-        if cache.get(key):
-            cache.set(key, None, 0)
-        return True
-    return False
\ No newline at end of file
+    path = reverse(view_name, args=args)
+    # expire the page, if it has been cached
+    return bool(expire_view_caches([(path, None)], key_prefix, method))
+
+
+def get_view_cache_keys(paths, key_prefix=None, method="GET"):
+    """
+    Keys of cached pages (see cache_page or the cache middleware) for a
+    list of (url, language code) tuples, based on get_cache_key (pages
+    without a header list have not been cached).
+    """
+    page_cache = get_cache(settings.CACHE_MIDDLEWARE_ALIAS)
+    keys = []
+    for url, language in paths:
+        url = urlsplit(url)
+        request = HttpRequest()
+        request.method = method
+        request.path = url.path
+        request.META["QUERY_STRING"] = url.query
+        request.LANGUAGE_CODE = language or settings.LANGUAGE_CODE
+        key = get_cache_key(request, key_prefix, method, cache=page_cache)
+        if key is not None:
+            keys.append(key)
+    return keys
+
+
+def expire_view_caches(paths, key_prefix=None, method="GET"):
+    """
+    Expire cached pages for a list of (url, language code) tuples
+    with a single delete_many (see get_view_cache_keys).
+
+    With defer_cache_invalidation (and the default cache being used
+    with the cache middleware), the keys are deleted when leaving the
+    context manager. Returns the keys.
+    """
+    keys = get_view_cache_keys(paths, key_prefix, method)
+    deferred = getattr(_deferred, "keys", None)
+    if deferred is not None and settings.CACHE_MIDDLEWARE_ALIAS == DEFAULT_CACHE_ALIAS:
+        deferred.update(keys)
+    elif keys:
+        get_cache(settings.CACHE_MIDDLEWARE_ALIAS).delete_many(keys)
+    return keys
@@ -3,11 +3,8 @@
 # This is an example of a group validation function which you need to
 # implement yourself and assign with each group via the admin interface.
 
-# VOLA IMPORTS
-from vola.models import Plugin
 
-
-def group_validation(request, group, containeradminform, pluginadminforms):
+def group_validation(request, group, containeradminform, pluginadminforms, context=None):
     """
     Group validation
 
@@ -21,6 +18,10 @@ def group_validation(request, group, containeradminform, pluginadminforms):
         The group object
     * pluginadminforms
         A list of AdminForms for already existing and new/extra Plugins for a given Group
+    * context
+        A ValidationContext (see vola.admin), holding the original plugins
+        (before updating the instances) with ``context.originals``. Do not
+        query the database for the original plugins with each form.
 
     Please note that group_valid is called after validating each pluginform, so
     every instance is already being updated with the new values (though not saved yet).
@@ -34,7 +35,7 @@ def group_validation(request, group, containeradminform, pluginadminforms):
         # ORIGINAL PLUGIN
         try:
             print "ORIGINAL PLUGIN ID:", adminform.original.plugin_ptr_id
-            p = Plugin.objects.get(id=adminform.original.plugin_ptr_id).get_plugin
+            p = context.get_original(adminform)
             position_original = p.position
             position_updated = adminform.form.instance.position
             print "ORIGINAL PLUGIN (name, id, position):", p.__class__.__name__, p.id, p.position